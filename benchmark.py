@@ -0,0 +1,35 @@
+"""
+Performance benchmarks for PyElectroMan.
+
+Usage: python benchmark.py [section ...]
+
+Runs all sections when none are given and prints the results. Set
+SDL_VIDEODRIVER=dummy to run headless. The sections are in the benchmarks
+package, one module per feature.
+"""
+
+import sys
+
+from benchmarks import assets, levels, lookups, screens, sprites
+from benchmarks.common import init_game
+
+sections = {}
+for module in (sprites, assets, levels, screens, lookups):
+    sections.update(module.sections)
+
+
+def main():
+    names = sys.argv[1:] or list(sections)
+    for name in names:
+        if name not in sections:
+            print("Unknown section '%s', available: %s" %
+                  (name, ", ".join(sections)))
+            return
+    game, gameplay = init_game()
+    for name in names:
+        sections[name](gameplay)
+    game.quit()
+
+
+if __name__ == "__main__":
+    main()
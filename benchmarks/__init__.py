@@ -0,0 +1,4 @@
+"""
+Benchmark sections of benchmark.py, one module per feature. Every module
+has a sections dict of name -> function(gameplay) printing its results.
+"""
@@ -0,0 +1,153 @@
+"""
+Asset loading benchmarks: atlases, decoded cache, asset pack, threads.
+"""
+
+import os
+import time
+
+import emglobals as gl
+import emdata as da
+import emdisplay as di
+import emloader as ld
+import emmenu as mn
+import empack as pk
+import emsound as snd
+import em
+from benchmarks.common import (CACHE_FOLDER, report, timed, load_level,
+                               sprite_set_names)
+
+
+def bench_atlas(gameplay, repeat=5):
+    """Sprite set loading and blitting: separate surfaces versus atlas."""
+    names = sprite_set_names()
+    atlases = sum(1 for name in names
+                  if os.path.exists(da.atlas_file_path(name)))
+    report("atlas: separate sprite surfaces vs one atlas per set")
+    report("(%d sets, %d with prebuilt atlas file)" % (len(names), atlases))
+    results = {}
+    for mode in (False, True):
+        gl.sprite_atlas = mode
+        sets = []
+
+        def load_all():
+            del sets[:]
+            for name in names:
+                sprite_set = da.SpriteSet()
+                sprite_set.load(name)
+                sets.append(sprite_set)
+
+        load_ms = timed(load_all, repeat)
+        sprites = [sprite for sprite_set in sets
+                   for sprite in sprite_set.sprites if sprite]
+
+        def draw_all():
+            for number, sprite in enumerate(sprites):
+                di.draw_sprite(sprite, ((number % 13) * gl.SPRITE_X,
+                                        (number // 13) % 8 * gl.SPRITE_Y))
+
+        results[mode] = (load_ms, timed(draw_all, repeat * 10), len(sprites))
+    gl.sprite_atlas = True
+    report("%-10s %12s %12s %8s" % ("mode", "load ms", "blit ms", "sprites"))
+    for mode, label in ((False, "separate"), (True, "atlas")):
+        report("%-10s %12.2f %12.2f %8d" % ((label,) + results[mode]))
+    report()
+
+
+def bench_cache(gameplay, repeat=5):
+    """Sprite set loading: decoding source files versus decoded cache."""
+    names = sprite_set_names()
+    report("cache: decoding sources vs decoded sprite set cache")
+    report("(%d sets, eager sprites: the cache is not used for lazy ones)"
+           % len(names))
+    report("%-10s %12s %12s" % ("mode", "no cache ms", "cached ms"))
+    defaults = gl.sprite_atlas, gl.cache_folder, gl.lazy_sprites
+    gl.lazy_sprites = False
+
+    def load_all():
+        for name in names:
+            da.SpriteSet().load(name)
+
+    for mode, label in ((False, "separate"), (True, "atlas")):
+        gl.sprite_atlas = mode
+        gl.cache_folder = ""
+        source_ms = timed(load_all, repeat)
+        gl.cache_folder = CACHE_FOLDER
+        load_all()  # make sure the cache is filled
+        report("%-10s %12.2f %12.2f" % (label, source_ms,
+                                          timed(load_all, repeat)))
+    gl.sprite_atlas, gl.cache_folder, gl.lazy_sprites = defaults
+    report()
+
+
+def bench_pack(gameplay, repeat=5):
+    """Data loading: loose files versus memory-mapped asset pack."""
+    names = sprite_set_names()
+    levels = [name for name in gl.level_names
+              if os.path.exists(da.level_file_path(name))]
+    report("pack: loose data files vs asset pack (%s)" % gl.pack_file)
+    if not os.path.exists(gl.pack_file):
+        report("(no pack, run pack_assets.py first)")
+        report()
+        return
+    report("(%d sets, %d levels, sounds, no decoded cache)" %
+           (len(names), len(levels)))
+    report("%-10s %12s %12s" % ("mode", "loose ms", "pack ms"))
+    default_atlas, default_folder = gl.sprite_atlas, gl.cache_folder
+    gl.cache_folder = ""
+    pk.close_pack()
+
+    def load_all():
+        for name in names:
+            da.SpriteSet().load(name)
+        for name in levels:
+            da.LevelData().load(name)
+        snd.SoundManager()
+
+    for mode, label in ((False, "separate"), (True, "atlas")):
+        gl.sprite_atlas = mode
+        loose_ms = timed(load_all, repeat)
+        pk.open_pack()
+        report("%-10s %12.2f %12.2f" % (label, loose_ms,
+                                          timed(load_all, repeat)))
+        pk.close_pack()
+    gl.sprite_atlas, gl.cache_folder = default_atlas, default_folder
+    pk.open_pack()
+    report()
+
+
+def bench_startup(gameplay, repeat=5):
+    """Startup assets (Gameplay, menu letters, first level): threads."""
+    report("startup: menu letters, then Gameplay() + first level load")
+    report("(menu: letters only, as shown before Gameplay() is built)")
+    report("%-10s %8s %12s %12s" % ("threads", "started", "menu ms",
+                                    "load ms"))
+    default_threads = gl.loader_threads
+    for threads in (0, default_threads):
+        menu_ms = []
+
+        def start():
+            if gl.asset_loader:
+                gl.asset_loader.shutdown()
+                gl.asset_loader = None
+            gl.loader_threads = threads
+            start_time = time.perf_counter()
+            em.start_loader()
+            da.preload_sprite_set("letters", mn.Letters.CHAR_MAP.values())
+            mn.Letters().load()
+            menu_ms.append((time.perf_counter() - start_time) * 1000)
+            started = em.Gameplay()
+            load_level(started, 0)
+
+        load_ms = timed(start, repeat)
+        report("%-10d %8d %12.2f %12.2f" % (threads,
+                                            ld.worker_count(threads),
+                                            sum(menu_ms) / repeat, load_ms))
+    gl.loader_threads = default_threads
+    report("(%d CPUs)" % os.cpu_count())
+    report()
+
+
+sections = {"atlas": bench_atlas,
+            "cache": bench_cache,
+            "pack": bench_pack,
+            "startup": bench_startup}
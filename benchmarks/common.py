@@ -0,0 +1,74 @@
+"""
+Helpers shared by the benchmark sections.
+"""
+
+import os
+import statistics
+import time
+import logging
+
+import emglobals as gl
+from emglobals import XY
+import em
+
+
+CACHE_FOLDER = gl.cache_folder or "cache"  # decoded cache to compare with
+
+
+def report(text=""):
+    print(text)
+
+
+def timed(function, repeat):
+    """Return average time of function() call in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def median_times(functions, repeat):
+    """
+    Return median time of every function's calls in milliseconds, the
+    functions called in turns (so they share slower periods of the machine).
+    """
+    times = [[] for _ in functions]
+    for _ in range(repeat):
+        for function, calls in zip(functions, times):
+            start = time.perf_counter()
+            function()
+            calls.append(time.perf_counter() - start)
+    return [statistics.median(calls) * 1000 for calls in times]
+
+
+def init_game():
+    """Initialize display and gameplay objects (without the main menu)."""
+    logging.basicConfig(level=logging.WARNING)
+    game = em.Game()
+    game.init()
+    gameplay = em.Gameplay()
+    return game, gameplay
+
+
+def load_level(gameplay, number):
+    gl.current_level = number
+    gl.checkpoint.update(number, 0, XY(0, 0))
+    gameplay.load_level()
+
+
+def visible_sprites(screen):
+    """Return (sprite, position) pairs drawn for the screen's current frame."""
+    drawn = []
+    for entity in screen.background + screen.collisions + screen.active:
+        sprites = getattr(entity, "sprites", None)
+        if sprites:
+            drawn.append((sprites[entity.frame % len(sprites)],
+                          entity.get_position()))
+    return drawn
+
+
+def sprite_set_names():
+    """Return names of all sprite sets in the data folder."""
+    return [name for name in sorted(os.listdir(gl.data_folder))
+            if os.path.exists(os.path.join(gl.data_folder, name,
+                                           name + ".ebs"))]
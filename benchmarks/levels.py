@@ -0,0 +1,149 @@
+"""
+Level loading benchmarks: level files, level cache and Exit preload.
+"""
+
+import os
+import time
+
+import emglobals as gl
+import emdata as da
+import emgame as ga
+import emlevelbin as lb
+from benchmarks.common import report, timed, median_times, load_level
+
+
+def bench_levelfile(gameplay, repeat=20):
+    """Level loading: .ebl JSON versus compiled binary level."""
+    levels = [name for name in gl.level_names
+              if os.path.exists(da.level_file_path(name))]
+    report("levelfile: .ebl JSON vs compiled %s level" % lb.EXTENSION)
+    if not all(os.path.exists(lb.compiled_path(name)) for name in levels):
+        report("(no compiled levels, run compile_levels.py first)")
+        report()
+        return
+    report("(read: level file only, load: read + level start screen as")
+    report(" Level.load() with lazy screens, all: read + all screens;")
+    report(" medians of the formats timed in turns)")
+    report("%-8s %9s %9s %9s %9s %9s %9s" % ("level", "ebl read", "ebc read",
+                                            "ebl load", "ebc load",
+                                            "ebl all", "ebc all"))
+    for name in levels:
+        level = da.Level()
+        level.load(name)
+
+        def read_ebl():
+            return da.read_json(da.level_file_path(name))
+
+        def read_ebc():
+            return lb.read_level(lb.compiled_path(name))
+
+        def load(read):
+            level.data = read()
+            level.build(level.set_names)
+            level.get_screen(gl.checkpoint.get_screen())
+
+        def build(read):
+            level.data = read()
+            level.build(level.set_names)
+            level.screens.build_all()
+
+        results = median_times((read_ebl, read_ebc), repeat)
+        for run in (load, build):
+            results.extend(median_times((lambda: run(read_ebl),
+                                         lambda: run(read_ebc)), repeat))
+        report("%-8s %9.2f %9.2f %9.2f %9.2f %9.2f %9.2f" %
+               ((name,) + tuple(results)))
+        for set_name in level.set_names:
+            da.sprite_sets.release(set_name)
+    report()
+
+
+def bench_levels(gameplay, repeat=3):
+    """Level switching: sprite set registry budget and level cache size."""
+    order = list(range(8)) + [0, 0, 7, 6, 7, 6, 5]
+    report("levels: load levels %s" % order)
+    report("%-12s %6s %10s %10s %10s %8s" % (
+        "budget MiB", "cache", "load ms", "sets MiB", "cache MiB",
+        "hits"))
+    defaults = gl.sprite_set_budget, gl.level_cache_size
+    for budget, size in ((0, 0), (defaults[0], 0), defaults):
+        gl.sprite_set_budget, gl.level_cache_size = budget, size
+        hits = []
+
+        def switch():
+            da.levels.clear()
+            da.sprite_sets.evict()
+            for number in order:
+                load_level(gameplay, number)
+            hits.append(da.levels.hits)
+
+        load_ms = timed(switch, repeat) / len(order)
+        report("%-12d %6d %10.2f %10.1f %10.1f %5d/%d" % (
+            budget // (1024 * 1024), size, load_ms,
+            da.sprite_sets.get_memory_size() / (1024 * 1024),
+            da.levels.get_memory_size() / (1024 * 1024), hits[-1],
+            len(order)))
+    gl.sprite_set_budget, gl.level_cache_size = defaults
+    report()
+
+
+def wait_preload(preload):
+    """
+    Wait until files requested by the LevelPreload are decoded (without
+    the asset loader its step() reads them).
+    """
+    loader = gl.asset_loader
+    while loader:
+        with loader.lock:
+            futures = [loader.pending[path] for path in preload.paths
+                       if path in loader.pending]
+        # the level file is done after it requested the sprite sets
+        if all(future.done() for future in futures):
+            return
+        time.sleep(0.001)
+
+
+def bench_exit(gameplay, repeat=5):
+    """Level exit: loading the next level versus preloaded one."""
+    report("exit: load of the next level at the Exit, without vs with "
+           "preload on the Exit screen")
+    report("(next level not cached, its sprite sets not loaded)")
+    report("%-8s %-8s %10s %10s" % ("level", "next", "load ms",
+                                    "preload ms"))
+    defaults = gl.sprite_set_budget, gl.preload_exit_level
+    gl.sprite_set_budget = 0
+    for number in range(7):
+        results = []
+        for preload in (False, True):
+            gl.preload_exit_level = preload
+            elapsed = 0
+            for _ in range(repeat):
+                da.levels.clear()
+                da.sprite_sets.evict()
+                load_level(gameplay, number)
+                exits = [s for s in range(256) if gl.level.has_screen(s) and
+                         any(isinstance(obj, ga.Exit)
+                             for obj in gl.level.get_screen(s).active)]
+                gl.screen_manager.change_screen(exits[0])
+                gameplay.loop_run()
+                if gameplay.preload:
+                    # the player walking to the Exit, idle frame time
+                    wait_preload(gameplay.preload)
+                    while not gameplay.preload.step():
+                        wait_preload(gameplay.preload)
+                gl.current_level = number + 1
+                start = time.perf_counter()
+                gameplay.load_level()
+                elapsed += time.perf_counter() - start
+            results.append(elapsed * 1000 / repeat)
+        report("%-8s %-8s %10.2f %10.2f" % (
+            gl.level_names[number], gl.level_names[number + 1],
+            results[0], results[1]))
+    gl.sprite_set_budget, gl.preload_exit_level = defaults
+    load_level(gameplay, 0)
+    report()
+
+
+sections = {"levelfile": bench_levelfile,
+            "levels": bench_levels,
+            "exit": bench_exit}
@@ -0,0 +1,156 @@
+"""
+Level data lookup benchmarks: teleports, screen graph and positions.
+"""
+
+import time
+
+import emglobals as gl
+from emglobals import XY
+import emdata as da
+import emgame as ga
+import emgraph as gr
+from benchmarks.common import report, timed, load_level
+
+
+def scan_teleport_target(screen_number, position):
+    """Teleport target found by scanning active entities of the screens."""
+    x, top = position.x, position.y
+    while True:
+        screen = gl.screen_manager.inspect_screen(screen_number)
+        ys = set(obj.get_y() for obj in (screen.active if screen else ())
+                 if isinstance(obj, ga.Teleport) and obj.get_x() == x)
+        for y in range(top, 0, -gl.SPRITE_Y):
+            if y in ys:
+                return screen_number, XY(x, y)
+        top = (gl.SCREEN_Y + 1) * gl.SPRITE_Y
+        screen_number = (screen_number - 16) % 256
+
+
+def bench_teleport(gameplay, repeat=20):
+    """Teleport targets: screen scan versus the level's link table."""
+    report("teleport: target of every teleport "
+           "(scan: active entities of the screens above, "
+           "table: Level.get_teleport_target)")
+    report("%-8s %9s %10s %9s %9s" % ("level", "teleports", "index ms",
+                                      "scan us", "table us"))
+    for number, name in enumerate(gl.level_names[:8]):
+        load_level(gameplay, number)
+        level = gl.level
+        touched = [(key[0], XY(key[1], key[2]))
+                   for key in level.teleport_links]
+        index_ms = timed(level.index_teleports, repeat)
+        results = []
+        for find in (scan_teleport_target, level.get_teleport_target):
+            # built screens for the scan, as after visiting them
+            for screen_number, position in touched:
+                assert (find(screen_number, position) ==
+                        level.get_teleport_target(screen_number, position))
+
+            def find_all():
+                for screen_number, position in touched:
+                    find(screen_number, position)
+
+            results.append(timed(find_all, repeat) * 1000 /
+                           max(len(touched), 1))
+        report("%-8s %9d %10.2f %9.1f %9.1f" % (
+            name, len(touched), index_ms, results[0], results[1]))
+    load_level(gameplay, 0)
+    report()
+
+
+def bench_graph(gameplay, repeat=20):
+    """Screen graph: analysing the tile layers versus the graph file."""
+    report("graph: screen openings and links (emgraph.py)")
+    report("%-8s %7s %6s %10s %9s %10s" % ("level", "screens", "links",
+                                          "analyse ms", "file ms",
+                                          "reachable"))
+    for number, name in enumerate(gl.level_names[:8]):
+        load_level(gameplay, number)
+        level = gl.level
+
+        def analyse():
+            gr.ScreenGraph(gr.analyse(level.data["screens"],
+                                      level.sprite_table))
+
+        def read():
+            level.graph = None
+            level.get_graph()
+
+        analyse_ms = timed(analyse, repeat)
+        file_ms = timed(read, repeat)
+        graph = level.get_graph()
+        links = sum(len(graph.get_links(s)) for s in range(256))
+        report("%-8s %7d %6d %10.2f %9.2f %10d" % (
+            name, level.screen_count(), links, analyse_ms, file_ms,
+            len(graph.get_reachable(gl.checkpoint.get_screen()))))
+    load_level(gameplay, 0)
+    report()
+
+
+def bench_positions(gameplay, repeat=20):
+    """Level data objects: scanning the active list versus position index."""
+    report("positions: lookup and removal of every active entity "
+           "of the most crowded screen")
+    report("(scan: first entity of the active list at the position, "
+           "index: Screen.find and Screen.remove)")
+    report("%-8s %6s %6s %11s %12s %11s %12s" % (
+        "level", "screen", "active", "scan find", "index find",
+        "scan del", "index del"))
+    for number, name in enumerate(gl.level_names[:8]):
+        load_level(gameplay, number)
+        level = gl.level
+        screen_number = max(
+            (s for s in range(256) if level.has_screen(s)),
+            key=lambda s: len(level.get_screen(s).active))
+        cs = level.get_screen(screen_number)
+        entities = list(cs.active)
+        positions = [entity.copy_position() for entity in entities]
+
+        def scan(active, position):
+            for obj in active:
+                if obj.position == position:
+                    return obj
+            return None
+
+        def scan_find():
+            for position in positions:
+                scan(cs.active, position)
+
+        def index_find():
+            for position in positions:
+                cs.find(position)
+
+        def copies():
+            screens = []
+            for _ in range(repeat):
+                screen = da.Screen()
+                for entity in entities:
+                    screen.add(entity)
+                screens.append(screen)
+            return screens
+
+        def removal(remove):
+            screens = copies()
+            start = time.perf_counter()
+            for screen in screens:
+                for entity in reversed(entities):
+                    remove(screen, entity)
+            return (time.perf_counter() - start) * 1000 / repeat
+
+        def scan_remove(screen, entity):
+            screen.active.remove(scan(screen.active, entity.position))
+
+        count = len(entities)
+        report("%-8s %6d %6d %9.1fus %10.1fus %9.1fus %10.1fus" % (
+            name, screen_number, count,
+            timed(scan_find, repeat) * 1000 / count,
+            timed(index_find, repeat) * 1000 / count,
+            removal(scan_remove) * 1000 / count,
+            removal(da.Screen.remove) * 1000 / count))
+    load_level(gameplay, 0)
+    report()
+
+
+sections = {"teleport": bench_teleport,
+            "graph": bench_graph,
+            "positions": bench_positions}
@@ -0,0 +1,186 @@
+"""
+Level screen benchmarks: building, respawn, prefetch and randoms.
+"""
+
+import time
+import tracemalloc
+
+import emglobals as gl
+from emglobals import XY
+import emdata as da
+import emdisplay as di
+from benchmarks.common import report, timed, load_level
+
+
+def bench_screens(gameplay, repeat=10):
+    """Level screens: built with the level versus on first access."""
+    report("screens: eager vs lazy screens (gl.lazy_screens)")
+    report("(load: build from read data + start screen, "
+           "reset: respawn, KiB: screen objects after load)")
+    report("%-8s %9s %9s %9s %9s %9s %9s" % (
+        "level", "eager ms", "lazy ms", "eager rs", "lazy rs",
+        "eager KiB", "lazy KiB"))
+    default = gl.lazy_screens
+    for number, name in enumerate(gl.level_names[:8]):
+        level = da.Level()
+        level.load(name)
+        results = []
+        for lazy in (False, True):
+            gl.lazy_screens = lazy
+
+            def load():
+                level.build(level.set_names)
+                level.get_screen(gl.checkpoint.get_screen())
+
+            def reset():
+                level.reset_screens()
+                level.get_screen(gl.checkpoint.get_screen())
+
+            load_ms = timed(load, repeat)
+            reset_ms = timed(reset, repeat)
+            level.screens = None
+            tracemalloc.start()
+            load()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            results.append((load_ms, reset_ms, size / 1024))
+        report("%-8s %9.2f %9.2f %9.2f %9.2f %9.1f %9.1f" % (
+            name, results[0][0], results[1][0], results[0][1],
+            results[1][1], results[0][2], results[1][2]))
+        for set_name in level.set_names:
+            da.sprite_sets.release(set_name)
+    gl.lazy_screens = default
+    load_level(gameplay, 0)
+    report()
+
+
+def bench_respawn(gameplay, repeat=20):
+    """Respawn: rebuilding every screen versus only the built ones."""
+    visits = 8
+    report("respawn: reset_level + checkpoint screen, %d screens visited"
+           % visits)
+    report("(eager: all screens built again, lazy: visited ones only)")
+    report("%-8s %8s %11s %11s" % ("level", "screens", "eager ms",
+                                   "lazy ms"))
+    default = gl.lazy_screens
+    for number, name in enumerate(gl.level_names[:8]):
+        load_level(gameplay, number)
+        level = gl.level
+        visited = [s for s in range(256) if level.has_screen(s)][:visits]
+        results = []
+        for lazy in (False, True):
+            gl.lazy_screens = lazy
+
+            def respawn():
+                for screen_number in visited:
+                    gl.screen_manager.change_screen(screen_number)
+                start = time.perf_counter()
+                gl.screen_manager.reset_level()
+                gl.screen_manager.change_screen(gl.checkpoint.get_screen())
+                return time.perf_counter() - start
+
+            respawn()
+            results.append(sum(respawn() for _ in range(repeat)) * 1000 /
+                           repeat)
+        report("%-8s %8d %11.2f %11.2f" % (name, level.screen_count(),
+                                           results[0], results[1]))
+    gl.lazy_screens = default
+    load_level(gameplay, 0)
+    report()
+
+
+def transition_frame(gameplay, screen_number=None):
+    """
+    Return time of a frame's screen work (changing to the screen when
+    given, hero collision checks, render) in milliseconds.
+    """
+    start = time.perf_counter()
+    if screen_number is not None:
+        gl.screen_manager.change_screen(screen_number)
+    gl.screen = gl.screen_manager.get_screen()
+    gl.player.check_ground(gl.screen)
+    gl.player.check_move(XY(8, 0), gl.screen)
+    di.clear_screen()
+    gameplay.loop_end()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_prefetch(gameplay, repeat=3):
+    """Screen transitions: cold screens versus prefetched neighbours."""
+    report("prefetch: frame entering the linked right neighbour screen "
+           "(gl.prefetch_screens)")
+    report("(screen change + hero collision checks + render, "
+           "frame: the next one on the prefetched screen)")
+    report("%-8s %6s %9s %12s %9s" % ("level", "pairs", "cold ms",
+                                      "prefetch ms", "frame ms"))
+    default = gl.prefetch_screens
+    for number, name in enumerate(gl.level_names[:8]):
+        load_level(gameplay, number)
+        level = gl.level
+        graph = level.get_graph()
+        pairs = [s for s in range(255)
+                 if graph.get_links(s).get("right") == s + 1]
+        results = []
+        for prefetch in (False, True):
+            gl.prefetch_screens = prefetch
+            enter = frame = 0
+            for _ in range(repeat):
+                # screens not built yet, as after loading the level
+                level.screens = level.create_screens()
+                gl.screen_manager.add_screens(level.screens)
+                for screen_number in pairs:
+                    gl.screen_manager.change_screen(screen_number)
+                    while gl.screen_manager.prefetch():
+                        pass
+                    enter += transition_frame(gameplay, screen_number + 1)
+                    frame += transition_frame(gameplay)
+            count = len(pairs) * repeat
+            results.append((enter / count, frame / count))
+        report("%-8s %6d %9.2f %12.2f %9.2f" % (
+            name, len(pairs), results[0][0], results[1][0], results[1][1]))
+    gl.prefetch_screens = default
+    load_level(gameplay, 0)
+    report()
+
+
+def bench_randoms(gameplay, repeat=2000):
+    """Screen randoms: drawing them versus the screen random table."""
+    report("randoms: gl.init_screen_randoms of every screen "
+           "(draw: Borland rand() sequence, table: gl.screen_random_table)")
+    seed = gl.rand_seed
+
+    def make_table():
+        gl.screen_random_table = None
+        gl.init_screen_randoms(0)
+
+    table_ms = timed(make_table, 20)
+    draw_us = timed(lambda: [gl.draw_screen_randoms(screen_number)
+                             for screen_number in range(256)],
+                    repeat // 100) * 1000 / 256
+    table_us = timed(lambda: [gl.init_screen_randoms(screen_number)
+                              for screen_number in range(256)],
+                     repeat // 100) * 1000 / 256
+    report("table made in %.2f ms, per screen: draw %.2f us, "
+           "table %.2f us" % (table_ms, draw_us, table_us))
+    report("%-6s %12s %12s" % ("count", "single us", "batch us"))
+    for count in (gl.SCREEN_X, 100, 1000):
+
+        def single():
+            gl.srand(seed)
+            [gl.random(256) for _ in range(count)]
+
+        def batch():
+            gl.srand(seed)
+            gl.random(256, count)
+
+        single_us = timed(single, repeat // 10) * 1000
+        batch_us = timed(batch, repeat // 10) * 1000
+        report("%-6d %12.1f %12.1f" % (count, single_us, batch_us))
+    gl.srand(seed)
+    report()
+
+
+sections = {"screens": bench_screens,
+            "respawn": bench_respawn,
+            "prefetch": bench_prefetch,
+            "randoms": bench_randoms}
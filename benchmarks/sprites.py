@@ -0,0 +1,219 @@
+"""
+Sprite benchmarks: drawing, surface formats, metadata and lazy images.
+"""
+
+import pygame
+
+import emglobals as gl
+import emdata as da
+import emdisplay as di
+import em
+from benchmarks.common import (CACHE_FOLDER, report, timed, load_level,
+                               visible_sprites)
+
+
+def bench_render(gameplay, repeat=20):
+    """Sprite drawing: per-frame scale2x versus pre-scaled display images."""
+    report("render: per-frame scale2x vs pre-scaled display_image")
+    report("(time to draw every screen of the level once)")
+    report("%-8s %7s %12s %12s %8s" % ("level", "blits", "scale2x ms",
+                                        "cached ms", "speedup"))
+
+    for number in range(8):
+        load_level(gameplay, number)
+        drawn = []
+        for screen in gl.screen_manager.get_screens():
+            if screen:
+                drawn.extend(visible_sprites(screen))
+
+        def draw_scaled():
+            for sprite, position in drawn:
+                scaled = pygame.transform.scale2x(sprite.image)
+                gl.display.blit(scaled, (position.x * 2, position.y * 2))
+
+        def draw_cached():
+            for sprite, position in drawn:
+                di.draw_sprite(sprite, position)
+
+        scaled_ms = timed(draw_scaled, repeat)
+        cached_ms = timed(draw_cached, repeat)
+        report("%-8s %7d %12.2f %12.2f %7.1fx" % (
+            gl.level_names[number], len(drawn), scaled_ms, cached_ms,
+            scaled_ms / cached_ms if cached_ms else 0))
+    report()
+
+
+def bench_blit(gameplay, repeat=20):
+    """Sprite drawing: alpha blits versus opaque/colorkey surfaces."""
+    report("blit: all sprites as alpha vs classified opaque/colorkey/alpha")
+    report("(all screens of the level drawn once, sprite blits only)")
+    report("%-8s %-8s %10s %10s %8s %8s %8s" % (
+        "level", "mode", "alpha ms", "class ms", "opaque", "colorkey",
+        "alpha"))
+    defaults = gl.sprite_atlas, gl.classify_sprites
+    for number, name in enumerate(gl.level_names[:8]):
+        for atlas in (False, True):
+            gl.sprite_atlas = atlas
+            results = []
+            for classify in (False, True):
+                gl.classify_sprites = classify
+                # drop the levels' sets, so they are loaded in this mode
+                da.levels.clear()
+                budget, gl.sprite_set_budget = gl.sprite_set_budget, 0
+                da.sprite_sets.evict()
+                gl.sprite_set_budget = budget
+                load_level(gameplay, number)
+                drawn = []
+                for screen_number in range(256):
+                    gl.screen_manager.change_screen(screen_number)
+                    screen = gl.screen_manager.get_screen()
+                    if screen:
+                        drawn.extend(visible_sprites(screen))
+
+                def draw_all():
+                    for sprite, position in drawn:
+                        di.draw_sprite(sprite, position)
+
+                draw_all()  # make lazy sprite images
+                di.reset_blit_counts()
+                draw_all()
+                counts = dict(di.blit_counts)
+                results.append(timed(draw_all, repeat))
+            report("%-8s %-8s %10.2f %10.2f %8d %8d %8d" % (
+                name, ("separate", "atlas")[atlas], results[0], results[1],
+                counts["opaque"], counts["colorkey"], counts["alpha"]))
+    gl.sprite_atlas, gl.classify_sprites = defaults
+    report()
+
+
+def bench_palette(gameplay, repeat=50):
+    """Level sprite sets: 32-bit RGBA surfaces versus 8-bit VGA palette."""
+    report("palette: RGBA vs 8-bit palettized sprite sets (atlas mode %s)" %
+           ("on" if gl.sprite_atlas else "off"))
+    report("(memory of both level sets, blit of each of their sprites once)")
+    report("%-8s %10s %10s %10s %10s %8s" % ("level", "RGBA KiB", "8-bit KiB",
+                                              "RGBA ms", "8-bit ms",
+                                              "sprites"))
+    default_palette = gl.sprite_palette
+    for name in gl.level_names[:8]:
+        results = []
+        for mode in (False, True):
+            gl.sprite_palette = mode
+            level = da.LevelData()
+            level.load(name)
+            sets = []
+            for set_name in level.data["names"][:2]:
+                sets.append(da.SpriteSet())
+                sets[-1].load(set_name)
+            sprites = [sprite for sprite_set in sets
+                       for sprite in sprite_set.sprites if sprite]
+
+            def draw_all():
+                for number, sprite in enumerate(sprites):
+                    di.draw_sprite(sprite, ((number % 13) * gl.SPRITE_X,
+                                            (number // 13) % 8 * gl.SPRITE_Y))
+
+            size = sum(sprite_set.get_memory_size() for sprite_set in sets)
+            results.append((size / 1024,
+                            timed(draw_all, repeat)))
+        report("%-8s %10.0f %10.0f %10.2f %10.2f %8d" % (
+            name, results[0][0], results[1][0], results[0][1], results[1][1],
+            len(sprites)))
+    gl.sprite_palette = default_palette
+    report()
+
+
+def bench_tables(gameplay, repeat=20):
+    """Sprite metadata queries: SpriteData attributes versus SpriteTable."""
+    if da.numpy is None:
+        report("tables: skipped, NumPy is not installed")
+        report()
+        return
+    numpy = da.numpy
+    report("tables: per-sprite flag() vs vectorized SpriteTable query")
+    report("(touchable/shootable tiles in all layers of the level)")
+    report("%-8s %10s %10s %8s" % ("level", "sprite ms", "table ms",
+                                   "tiles"))
+    for name in gl.level_names[:8]:
+        level = da.Level()
+        level.load(name)
+        layers = [layer for layers in level.data["screens"] if layers
+                  for layer in layers if layer]
+        cells = numpy.array(layers, numpy.uint8).ravel()
+
+        def by_sprite():
+            count = 0
+            for layer in layers:
+                for sidx in layer:
+                    if sidx:
+                        sprite = level.get_sprite(sidx)
+                        if (sprite.flag("touchable") or
+                                sprite.flag("shootable")):
+                            count += 1
+            return count
+
+        def by_table():
+            table = level.sprite_table
+            mask = da.flag_masks["touchable"] | da.flag_masks["shootable"]
+            hits = (table.flags & mask) != 0
+            hits[0] = False
+            return int(numpy.count_nonzero(hits[cells]))
+
+        assert by_sprite() == by_table()
+        report("%-8s %10.2f %10.2f %8d" % (
+            name, timed(by_sprite, repeat), timed(by_table, repeat),
+            by_table()))
+        for set_name in level.set_names:
+            da.sprite_sets.release(set_name)
+    report()
+
+
+def bench_lazy(gameplay, repeat=10):
+    """Time to first playable frame: eager versus lazy sprite images."""
+    level = da.LevelData()
+    level.load(gl.level_names[0])
+    names = ["hero", "enem", "weapons", "info"] + level.data["names"][:2]
+    report("lazy: eager vs lazy sprite images, no sets loaded before")
+    report("(sets: loading %s; frame: Gameplay() + first level + first frame)"
+           % ", ".join(names))
+    report("%-10s %6s %11s %11s %11s %11s" % (
+        "mode", "cache", "eager sets", "lazy sets", "eager frame",
+        "lazy frame"))
+    defaults = gl.sprite_atlas, gl.cache_folder, gl.lazy_sprites
+    for atlas, cache in ((False, ""), (False, CACHE_FOLDER),
+                         (True, ""), (True, CACHE_FOLDER)):
+        gl.sprite_atlas, gl.cache_folder = atlas, cache
+        sets_ms = []
+        frame_ms = []
+        for lazy in (False, True):
+            gl.lazy_sprites = lazy
+
+            def load_sets():
+                da.levels.clear()
+                da.sprite_sets.clear()
+                for name in names:
+                    da.sprite_sets.acquire(name)
+
+            def first_frame():
+                da.levels.clear()
+                da.sprite_sets.clear()
+                started = em.Gameplay()
+                load_level(started, 0)
+                gl.screen = gl.screen_manager.get_screen()
+                started.loop_end()
+
+            load_sets()  # fill the decoded cache
+            sets_ms.append(timed(load_sets, repeat))
+            frame_ms.append(timed(first_frame, repeat))
+        report("%-10s %6s %11.2f %11.2f %11.2f %11.2f" % (
+            ("separate", "atlas")[atlas], ("off", "on")[bool(cache)],
+            sets_ms[0], sets_ms[1], frame_ms[0], frame_ms[1]))
+    gl.sprite_atlas, gl.cache_folder, gl.lazy_sprites = defaults
+    report()
+
+
+sections = {"render": bench_render,
+            "blit": bench_blit,
+            "palette": bench_palette,
+            "tables": bench_tables,
+            "lazy": bench_lazy}
@@ -0,0 +1,35 @@
+"""
+Compile levels.
+
+Writes <level>.ebc (binary level, see emlevelbin.py) next to every .ebl
+level file of the data folder. LevelData.load() reads the compiled level
+as one memory-mapped buffer instead of parsing the JSON, as long as it is
+not older than its .ebl.
+
+Run this script again after changing any .ebl file (including
+create_test_level.py runs); stale compiled levels are not used.
+"""
+
+import json
+import os
+
+import emglobals as gl
+import emlevelbin as lb
+
+
+def compile_levels():
+    """Compile every .ebl file of the data folder."""
+    for file_name in sorted(os.listdir(gl.data_folder)):
+        name, extension = os.path.splitext(file_name)
+        if extension != ".ebl":
+            continue
+        with open(lb.source_path(name), "rt") as jfile:
+            data = json.load(jfile)
+        lb.write_level(lb.compiled_path(name), data)
+        print("Created %s (%d bytes, .ebl %d bytes)" % (
+            lb.compiled_path(name), os.path.getsize(lb.compiled_path(name)),
+            os.path.getsize(lb.source_path(name))))
+
+
+if __name__ == "__main__":
+    compile_levels()
@@ -0,0 +1,37 @@
+"""
+Generate sprite set atlases.
+
+Packs the separate <set>_NN.png sprites of every set in the data folder
+into one <set>_atlas.png (a column of 24x24 cells with 1 pixel gutters,
+cell N holds sprite N).
+SpriteSet.load() uses the atlas when present, so a set is decoded from a
+single file instead of up to 64 small ones.
+
+Run this script again after changing any sprite PNG.
+"""
+
+import json
+import os
+import pygame
+
+import emglobals as gl
+import emdata as da
+
+
+def create_atlases():
+    """Create atlas PNG for every sprite set in the data folder."""
+    for set_name in sorted(os.listdir(gl.data_folder)):
+        set_file_path = os.path.join(gl.data_folder, set_name,
+                                     set_name + ".ebs")
+        if not os.path.exists(set_file_path):
+            continue
+        with open(set_file_path, "rt") as jfile:
+            used_table = json.load(jfile)["used table"]
+        atlas = da.build_atlas(set_name, used_table)
+        pygame.image.save(atlas, da.atlas_file_path(set_name))
+        print("Created %s (%d sprites)" % (da.atlas_file_path(set_name),
+                                           sum(1 for u in used_table if u)))
+
+
+if __name__ == "__main__":
+    create_atlases()
@@ -3,12 +3,15 @@
 import emglobals as gl
 from emglobals import XY
 import emdata as da
+import emloader as ld
+import empack as pk
 import emgame as ga
 import emdisplay as di
 import emhero as pl
 import emother as ot
 import emmenu as mn
 import emsound as snd
+import emwatch as wt
 import pygame
 import logging
 import time
@@ -18,21 +21,35 @@ class Gameplay:
     """
     Main gameplay functionality class.
     Singleton by design.
+    Startup files are decoded in background, the global objects are built
+    of them on the main thread: right away, or part by part by
+    build_step() when in_parts is set (while the main menu shows).
     """
-    def __init__(self):
+    def __init__(self, in_parts=False):
+        gl.loading_progress = 0.0
         gl.data_folder = "data"
-        gl.level = da.Level()
+        start_loader()
+        # decode startup assets in background, build parts only finalize
+        set_paths = dict((set_name, da.preload_sprite_set(set_name))
+                         for set_name in ("hero", "enem", "weapons", "info"))
+        sound_paths = snd.preload_sounds()
+        # emdata.LevelPreload of the first level, later of the next one,
+        # load_level() takes what it loaded and cancels the rest
+        self.preload = da.preload_level(gl.level_names[gl.current_level])
+        self.preload_screen = None  # screen the preload was checked for
         self.controller = ga.Controller()
-        # initialize a few global objects
-        # thus loading associated sprite sets
-        gl.screen_manager = ga.ScreenManager()
-        gl.player = pl.PlayerEntity(self.controller)
-        gl.enemies = ot.Enemies()
-        gl.weapons = ot.Weapons()
-        gl.info = ot.Info()
-        di.indicators = di.Indicators()
-        gl.checkpoint = ga.ActiveCheckpoint()
-        gl.sound_manager = snd.SoundManager()
+        # (part, sound name of "sound" parts, files it waits for),
+        # sounds one by one as each takes a few milliseconds to make
+        self.parts = [("player", None, set_paths["hero"]),
+                      ("enemies", None, set_paths["enem"]),
+                      ("weapons", None, set_paths["weapons"]),
+                      ("info", None, set_paths["info"]),
+                      ("indicators", None, []),
+                      ("mixer", None, [])]
+        self.parts.extend(("sound", name, [path])
+                          for name, path in sound_paths.items())
+        self.paths = [path for part in self.parts for path in part[2]]
+        self.built = 0  # number of parts built
         # initialize rest
         self.loop = True
         self.screens_map = None
@@ -54,8 +71,58 @@ class Gameplay:
                              pygame.K_0: self.on_k_0,
                              pygame.K_d: self.on_k_d,
                              pygame.K_f: self.on_k_f,
+                             pygame.K_w: self.on_k_w,
                              pygame.K_F7: self.on_k_f7}
         self.deferred = None
+        self.watcher = None  # emwatch.DataWatcher in watch mode
+        if not in_parts:
+            while self.build_step(wait=True):
+                pass
+
+    def is_built(self):
+        return self.built == len(self.parts)
+
+    def build_step(self, wait=False):
+        """
+        Build the next part when its files are decoded (waiting for them
+        when wait is set) and update gl.loading_progress. When all parts
+        are built, step the first level's preload instead.
+        Return True when a part was built or the level loaded.
+        """
+        if self.is_built():
+            return (not wait and self.preload is not None and
+                    not self.preload.level and self.preload.step())
+        part, name, paths = self.parts[self.built]
+        ready = wait or all(ld.is_done(path) for path in paths)
+        if ready:
+            self.build_part(part, name)
+            self.built += 1
+        decoded = sum(1 for path in self.paths if ld.is_done(path))
+        gl.loading_progress = ((decoded + self.built) /
+                               (len(self.paths) + len(self.parts)))
+        return ready
+
+    def build_part(self, part, name=None):
+        """Build global objects of the part (on the main thread)."""
+        if part == "player":
+            gl.level = da.Level()
+            # initialize a few global objects
+            # thus loading associated sprite sets
+            gl.screen_manager = ga.ScreenManager()
+            gl.player = pl.PlayerEntity(self.controller)
+        elif part == "enemies":
+            gl.enemies = ot.Enemies()
+        elif part == "weapons":
+            gl.weapons = ot.Weapons()
+        elif part == "info":
+            gl.info = ot.Info()
+        elif part == "indicators":
+            di.indicators = di.Indicators()
+            gl.checkpoint = ga.ActiveCheckpoint()
+        elif part == "mixer":
+            gl.sound_manager = snd.SoundManager(load=False)
+        elif part == "sound":
+            gl.sound_manager.load_sound(name)
 
     @property
     def init_map(self):
@@ -66,9 +133,8 @@ class Gameplay:
         # pylint: enable-msg=E1121
         FULL = 0x33AA33
         EMPTY = 0x333333
-        screens = gl.screen_manager.get_screens()
         for scr in range(256):
-            if screens[scr]:
+            if gl.level.has_screen(scr):
                 pixels[(scr % 16) * 2 + 0][(scr // 16) * 2 + 0] = FULL
                 pixels[(scr % 16) * 2 + 1][(scr // 16) * 2 + 0] = FULL
                 pixels[(scr % 16) * 2 + 0][(scr // 16) * 2 + 1] = FULL
@@ -107,12 +173,17 @@ class Gameplay:
         """Display all objects (active and background) on the screen"""
         gl.screen_manager.update_active() # make sure newly created objects get displayed
         if screen:
-            for entity in screen.background:
-                entity.display()
-            for entity in screen.collisions:
-                entity.display()
-                if gl.show_collisions:
-                    entity.display_collisions()
+            backdrop = None if gl.show_collisions else screen.get_backdrop()
+            if backdrop:
+                # background and collisions drawn by the prefetch
+                di.draw_backdrop(backdrop)
+            else:
+                for entity in screen.background:
+                    entity.display()
+                for entity in screen.collisions:
+                    entity.display()
+                    if gl.show_collisions:
+                        entity.display_collisions()
             self.deferred = []
             for entity in screen.active:
                 deferred = entity.display()
@@ -254,6 +325,14 @@ class Gameplay:
             gl.disks = 3
             di.info_lines.add("Debug: 3 disks added")
 
+    def on_k_w(self):
+        """Debug: toggle data folder watch mode (Shift+W)"""
+        if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+            gl.watch_data = not gl.watch_data
+            self.watcher = wt.DataWatcher() if gl.watch_data else None
+            di.info_lines.add("Watch mode: %s" %
+                              ("ON" if gl.watch_data else "OFF"))
+
     def on_k_f7(self):
         """Toggle sound effects on/off (F7 - matches original game)"""
         if gl.sound_manager:
@@ -261,7 +340,9 @@ class Gameplay:
             di.info_lines.add("Sound: %s" % ("ON" if enabled else "OFF"))
 
     def load_level(self):
-        gl.level.load(gl.level_names[gl.current_level])
+        gl.level = da.levels.get(gl.level_names[gl.current_level])
+        # drop preloaded files the level didn't take
+        self.cancel_preload()
         gl.screen_manager.add_screens(gl.level.get_screens())
         self.screens_map = self.init_map
         start_screen = gl.checkpoint.get_screen()
@@ -280,6 +361,8 @@ class Gameplay:
 
     def loop_begin(self):
         di.clear_screen()
+        if self.watcher and self.watcher.poll():
+            self.screens_map = self.init_map
 
     def loop_events(self):
         for event in pygame.event.get():
@@ -294,8 +377,40 @@ class Gameplay:
                     self.key_handlers[event.key]()
         self.controller.update()
 
+    def preload_next_level(self):
+        """
+        Preload the level an Exit leads to while the player is on its
+        screen, so reaching the Exit doesn't wait for the level files.
+        Cancel the preload when the player leaves the screen.
+        """
+        screen = gl.screen
+        if screen is self.preload_screen:
+            return
+        self.preload_screen = screen
+        name = None
+        number = gl.current_level + 1
+        if (screen and number < len(gl.level_names) and
+                any(isinstance(obj, ga.Exit) for obj in screen.active)):
+            name = gl.level_names[number]
+            if name in da.levels.levels:
+                name = None  # cached, nothing to load
+        if self.preload and self.preload.name != name:
+            logging.info("Preload of level '%s' cancelled", self.preload.name)
+            self.cancel_preload()
+        if name and not self.preload:
+            logging.info("Preloading level '%s'", name)
+            self.preload = da.preload_level(name)
+
+    def cancel_preload(self):
+        if self.preload:
+            self.preload.cancel()
+            self.preload = None
+        self.preload_screen = None
+
     def loop_run(self):
         gl.screen = gl.screen_manager.get_screen()
+        if gl.preload_exit_level:
+            self.preload_next_level()
         if gl.screen:
             for active in gl.screen.active:
                 active.update()
@@ -313,11 +428,16 @@ class Gameplay:
     def show(self):
         """Display the screen."""
         di.message(XY(1000, 8),"logic: {0:>4.1f}\nrender: {1:>4.1f}".format(
-            round(gl.logic_time * 1000, 1), round(gl.render_time * 1000, 1)))
+            round(gl.logic_time * 1000, 1), round(gl.render_time * 1000, 1)) +
+            "\nblits o/c/a: {opaque}/{colorkey}/{alpha}".format(
+                **di.blit_counts))
+        di.reset_blit_counts()
         di.show()
 
     def start(self):
         self.load_level()
+        if gl.watch_data and not self.watcher:
+            self.watcher = wt.DataWatcher()
 
     def run(self):
         gl.loop_main_loop = True
@@ -354,6 +474,18 @@ class Gameplay:
             # rendering ended
             self.show() # show the screen
             gl.counter += 1
+            if self.preload and time.perf_counter() - logic_start < 0.02:
+                # next level's sprite set or the level itself (~15 ms)
+                self.preload.step()
+            while (time.perf_counter() - logic_start < 0.03 and
+                   gl.screen_manager.prefetch()):
+                # current and neighbouring screens (~1 ms each)
+                pass
+            if gl.sprite_warm_up:
+                # make lazy sprite images in the rest of the 50 ms frame,
+                # leaving 10 ms spare
+                da.sprite_sets.warm_up(
+                    0.04 - (time.perf_counter() - logic_start))
             clock.tick(20)  # keep constant frame rate (20fps)
 
     def stop(self):
@@ -377,12 +509,21 @@ class Gameplay:
             gl.player.temp = 0
 
 
+def start_loader():
+    """Open the asset pack and start the asset loader (once)."""
+    pk.open_pack()
+    threads = ld.worker_count(gl.loader_threads)
+    if threads and not gl.asset_loader:
+        gl.asset_loader = ld.AssetLoader(threads)
+
+
 class Game:
     """
     Main game class.
     Singleton by design.
     """
     def __init__(self):
+        gl.start_time = time.perf_counter()
         if gl.log_filename:
             # Log to file when filename is set (INFO level to reduce verbosity)
             logging.basicConfig(filename=gl.log_filename,
@@ -396,21 +537,36 @@ class Game:
     def init(self):
         di.init_display()
         di.info_lines.add("pyelectroman started")
+        # the main menu needs the letters only, the rest is loaded by
+        # start_gameplay() while the menu shows
+        start_loader()
+        da.preload_sprite_set("letters", mn.Letters.CHAR_MAP.values())
         time.perf_counter()
 
+    def start_gameplay(self):
+        """
+        Return Gameplay, built by the main menu part by part when
+        gl.background_boot is set (see Gameplay.build_step()).
+        """
+        return Gameplay(in_parts=gl.background_boot)
+
     def quit(self):
+        if gl.asset_loader:
+            gl.asset_loader.shutdown()
+        pk.close_pack()
         di.quit_display()
 
 def fast_main():
     game = Game()
     game.init()
-    gameplay = Gameplay()
+    gameplay = game.start_gameplay()
 
     # Main menu loop
     running = True
     while running:
-        # Show main menu
-        menu_result = mn.show_main_menu()
+        # Show main menu (it builds the gameplay and waits for it when
+        # a game is chosen)
+        menu_result = mn.show_main_menu(gameplay)
 
         if menu_result == "quit":
             running = False
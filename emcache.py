@@ -0,0 +1,113 @@
+"""
+Decoded sprite set cache module
+
+Keeps decoded and already scaled sprite set pixels together with the
+parsed .ebs tables in gl.cache_folder, one file per set:
+a JSON header line followed by raw RGBA pixels of every cached surface.
+An entry is used only while its signature (modification time and size of
+every file in the set folder, or of the asset pack when sets are read from
+it) still matches, so editing a sprite or rebuilding an atlas invalidates
+it.
+The cache is used only for sets decoded whole at load (atlas mode or
+gl.lazy_sprites off): lazy sprites decode just the files they need.
+"""
+
+import emglobals as gl
+import emloader as ld
+import json
+import os
+import logging
+import pygame
+
+CACHE_VERSION = 1
+
+
+def enabled():
+    """Return True when sprite sets are loaded through the cache."""
+    return bool(gl.cache_folder) and (gl.sprite_atlas or
+                                      not gl.lazy_sprites)
+
+
+def entry_path(set_name):
+    """Return path to the set's cache file (separate for atlas mode)."""
+    mode = "atlas" if gl.sprite_atlas else "sprites"
+    return os.path.join(gl.cache_folder, "%s.%s.cache" % (set_name, mode))
+
+
+def signature(set_name):
+    """Return cache signature of the set's source files."""
+    folder = os.path.join(gl.data_folder, set_name)
+    if ld.in_pack(os.path.join(folder, set_name + ".ebs")):
+        paths = [gl.asset_pack.path]
+    else:
+        paths = [os.path.join(folder, name)
+                 for name in sorted(os.listdir(folder))]
+    files = []
+    for path in paths:
+        stat = os.stat(path)
+        files.append([os.path.basename(path), stat.st_mtime_ns,
+                      stat.st_size])
+    return {"version": CACHE_VERSION,
+            "atlas": gl.sprite_atlas,
+            "files": files}
+
+
+def read_entry(path):
+    """Return (header, pixels) of cache file."""
+    with open(path, "rb") as cfile:
+        header = json.loads(cfile.readline())
+        pixels = cfile.read()
+    return header, pixels
+
+
+def has_entry(set_name):
+    """Return True when the set has a cache entry (maybe stale)."""
+    return enabled() and os.path.exists(entry_path(set_name))
+
+
+def load_set(set_name):
+    """
+    Return (set tables, surfaces) from the cache or None when the entry is
+    missing or stale. Surfaces (None for unused slots) are not converted.
+    """
+    if not has_entry(set_name):
+        return None
+    try:
+        header, pixels = ld.load_asset(entry_path(set_name), read_entry)
+    except (OSError, ValueError) as e:
+        logging.warning("Sprite set cache '%s' unreadable: %s", set_name, e)
+        return None
+    if header["signature"] != signature(set_name):
+        logging.info("Sprite set cache '%s' is stale", set_name)
+        return None
+    pixels = memoryview(pixels)
+    surfaces = []
+    offset = 0
+    for size in header["sizes"]:
+        if size:
+            length = size[0] * size[1] * 4
+            surfaces.append(pygame.image.frombuffer(
+                pixels[offset:offset + length], size, "RGBA"))
+            offset += length
+        else:
+            surfaces.append(None)
+    return header["set"], surfaces
+
+
+def save_set(set_name, tables, surfaces):
+    """Store set tables and surfaces (None for unused slots) in the cache."""
+    header = {"signature": signature(set_name),
+              "set": tables,
+              "sizes": [s.get_size() if s else None for s in surfaces]}
+    path = entry_path(set_name)
+    try:
+        os.makedirs(gl.cache_folder, exist_ok=True)
+        # write aside and rename, never leaving a half written entry
+        with open(path + ".tmp", "wb") as cfile:
+            cfile.write(json.dumps(header).encode() + b"\n")
+            for surface in surfaces:
+                if surface:
+                    cfile.write(pygame.image.tobytes(surface, "RGBA"))
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logging.warning("Sprite set cache '%s' not saved: %s", set_name, e)
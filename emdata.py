@@ -3,19 +3,358 @@
 import emglobals as gl
 from emglobals import XY
 import emgame as ga
+import emdisplay as di
+import emloader as ld
+import emcache as ch
+import empalette as pa
+import emlevelbin as lb
+import emgraph as gr
+import array
+import collections
+import collections.abc
 import json
 import os
+import sys
+import threading
+import time
 import logging
 import pygame
+try:
+    import numpy
+except ImportError:
+    numpy = None  # SpriteTable uses array.array instead
 
 flag_masks = {"active" : 0x80, "touchable" : 0x40, "shootable" : 0x20,
               "stays_active" : 0x10, "destroyable" : 0x08,
               "in_front" : 0x04, "last_frame" : 0x02, "first_frame" : 0x01}
 
+# sprite set atlas layout: 64 source sized cells stacked in a single column
+# (keeps each sprite's rows close in memory for blitting), each surrounded
+# by a gutter holding copies of the sprite's edge pixels
+ATLAS_COLUMNS = 1
+ATLAS_CELL = (gl.SPRITE_X // 2, gl.SPRITE_Y // 2)  # source sprite size
+ATLAS_GUTTER = 1
+
+
+def sprite_file_path(set_name, number):
+    """Return path to the sprite's source PNG file."""
+    folder = os.path.join(gl.data_folder, set_name)
+    return os.path.join(folder, set_name + "_%02d.png" % number)
+
+
+def set_file_path(set_name):
+    """Return path to the sprite set's .ebs file."""
+    return os.path.join(gl.data_folder, set_name, set_name + ".ebs")
+
+
+def atlas_file_path(set_name):
+    """Return path to the sprite set's prebuilt atlas PNG file."""
+    folder = os.path.join(gl.data_folder, set_name)
+    return os.path.join(folder, set_name + "_atlas.png")
+
+
+def atlas_rect(number, scale=1):
+    """Return sprite[number] area within the (scaled) atlas as pygame.Rect."""
+    pitch_x = ATLAS_CELL[0] + 2 * ATLAS_GUTTER
+    pitch_y = ATLAS_CELL[1] + 2 * ATLAS_GUTTER
+    x = (number % ATLAS_COLUMNS) * pitch_x + ATLAS_GUTTER
+    y = (number // ATLAS_COLUMNS) * pitch_y + ATLAS_GUTTER
+    return pygame.Rect(x * scale, y * scale,
+                       ATLAS_CELL[0] * scale, ATLAS_CELL[1] * scale)
+
+
+def atlas_cell_rect(number, scale=1):
+    """Return sprite[number] area including its gutter as pygame.Rect."""
+    return atlas_rect(number, scale).inflate(2 * ATLAS_GUTTER * scale,
+                                             2 * ATLAS_GUTTER * scale)
+
+
+def build_atlas(set_name, used_table):
+    """
+    Pack used source PNGs of the set into a single atlas surface.
+    Unused cells stay fully transparent.
+    """
+    rows = (len(used_table) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+    size = (ATLAS_COLUMNS * (ATLAS_CELL[0] + 2 * ATLAS_GUTTER),
+            rows * (ATLAS_CELL[1] + 2 * ATLAS_GUTTER))
+    # pylint: disable-msg=E1121
+    atlas = pygame.Surface(size, pygame.SRCALPHA, 32)
+    # pylint: enable-msg=E1121
+    for number, used in enumerate(used_table):
+        if used:
+            put_atlas_cell(atlas, number,
+                           ld.load_image(sprite_file_path(set_name, number)))
+    return atlas
+
+
+def put_atlas_cell(atlas, number, image, scale=1):
+    """
+    Copy the source sized image into the (scaled) RGBA atlas cell[number],
+    which must be fully transparent.
+    """
+    if scale != 1:
+        image = pygame.transform.scale(image, (image.get_width() * scale,
+                                               image.get_height() * scale))
+    rect = atlas_rect(number, scale)
+    w, h = rect.size
+    gutter = ATLAS_GUTTER * scale
+    # max blending onto transparent black copies pixels unchanged
+    copy = pygame.BLEND_RGBA_MAX
+    atlas.blit(image, rect, special_flags=copy)
+    # extrude edges into the gutter, so scaling the whole atlas
+    # with scale2x gives the same pixels as scaling each sprite
+    edges = ((pygame.Rect(0, 0, 1, h), (rect.left - gutter, rect.top)),
+             (pygame.Rect(w - 1, 0, 1, h), (rect.right, rect.top)),
+             (pygame.Rect(0, 0, w, 1), (rect.left, rect.top - gutter)),
+             (pygame.Rect(0, h - 1, w, 1), (rect.left, rect.bottom)))
+    for edge, position in edges:
+        if edge.width == 1:
+            size = (gutter, h)
+        else:
+            size = (w, gutter)
+        atlas.blit(pygame.transform.scale(image.subsurface(edge), size),
+                   position, special_flags=copy)
+
+
+palette_indices = {}  # RGBA pixel value -> VGA palette index
+# alpha bits of the RGBA pixel values
+ALPHA_MASK = int.from_bytes(b"\0\0\0\xff", sys.byteorder)
+
+
+def to_indexed(image):
+    """
+    Return copy of the image as 8-bit surface with the original VGA
+    palette, transparent pixels (of any colour) as colorkey.
+    Return None when other pixels are not opaque palette colours.
+    """
+    if not palette_indices:
+        # first entry wins for colours listed more than once, opaque
+        # black never becomes the transparent index
+        colors = pa.rgb_palette()
+        for index in range(255, pa.TRANSPARENT, -1):
+            rgba = bytes(colors[index]) + b"\xff"
+            palette_indices[int.from_bytes(rgba, sys.byteorder)] = index
+        palette_indices[0] = pa.TRANSPARENT
+    # pixels are mapped exactly, SDL's own 32 to 8-bit blits are lossy
+    pixels = array.array("I", pygame.image.tobytes(image, "RGBA"))
+    try:
+        indices = bytes(map(palette_indices.__getitem__, pixels))
+    except KeyError:
+        # transparent pixels may keep some colour
+        pixels = [pixel if pixel & ALPHA_MASK else 0 for pixel in pixels]
+        try:
+            indices = bytes(map(palette_indices.__getitem__, pixels))
+        except KeyError:
+            return None
+    indexed = pygame.image.frombytes(indices, image.get_size(), "P")
+    indexed.set_palette(pa.rgb_palette())
+    indexed.set_colorkey(pa.TRANSPARENT)
+    return indexed
+
+
+# colorkey of display surfaces, not a colour of the VGA palette
+COLORKEY = (255, 0, 255)
+
+
+def classify(image):
+    """
+    Return blit class of the image (see emdisplay.BLIT_CLASSES):
+    "opaque" without transparent pixels, "colorkey" with fully transparent
+    or opaque pixels only, otherwise "alpha".
+    """
+    if not gl.classify_sprites:
+        return "alpha"
+    opaque = pygame.mask.from_surface(image, 254).count()
+    if opaque == image.get_width() * image.get_height():
+        return "opaque"
+    if opaque != pygame.mask.from_surface(image, 0).count():
+        return "alpha"
+    if image.get_bitsize() != 8 and pygame.mask.from_threshold(
+            image, COLORKEY + (255,), (1, 1, 1, 1)).count():
+        return "alpha"  # uses the colorkey as a real colour
+    return "colorkey"
+
+
+def blit_surface(image, blit_class, rle=True):
+    """
+    Return the (display) image in the cheapest format to blit for its class:
+    display format for "opaque", display format with colorkey for
+    "colorkey" (RLE accelerated unless blitted by parts, e.g. atlases),
+    unchanged for "alpha". 8-bit images stay 8-bit.
+    """
+    flags = pygame.RLEACCEL if rle else 0
+    if image.get_bitsize() == 8:
+        if blit_class == "opaque":
+            image.set_colorkey(None)
+        else:
+            image.set_colorkey(pa.TRANSPARENT, flags)
+        return image
+    if blit_class == "opaque":
+        return image.convert()
+    if blit_class == "colorkey":
+        # pylint: disable-msg=E1121
+        surface = pygame.Surface(image.get_size()).convert()
+        # pylint: enable-msg=E1121
+        surface.fill(COLORKEY)
+        surface.blit(image, (0, 0))
+        surface.set_colorkey(COLORKEY, flags)
+        return surface
+    return image
+
+
+def level_file_path(name):
+    """Return path to the level's .ebl file."""
+    return lb.source_path(name)
+
+
+def level_data_path(name):
+    """
+    Return path to the level file to read: the compiled level when it is
+    up to date (see emlevelbin.py), otherwise the .ebl file.
+    """
+    if lb.is_current(name):
+        return lb.compiled_path(name)
+    return level_file_path(name)
+
+
+def read_level(path):
+    """Return level data of .ebl or compiled level file."""
+    if path.endswith(lb.EXTENSION):
+        return lb.read_level(path)
+    return read_json(path)
+
+
+def screen_tiles(layers):
+    """Return screen layers data as tuples, the same for both formats."""
+    if not layers:
+        return None
+    return tuple(tuple(layer) if layer else None for layer in layers)
+
+
+def read_json(path):
+    return json.loads(ld.read_data(path))
+
+
+def read_json_file(path):
+    """Return parsed loose JSON file (never read from the asset pack)."""
+    with open(path, "rt") as jfile:
+        return json.load(jfile)
+
+
+def preload_sprite_set(set_name, numbers=None):
+    """
+    Request background decoding of the set's image files (numbers - only
+    these sprites, when not loaded by SpriteSet).
+    Prebuilt atlas is requested instead of the sprites in atlas mode,
+    decoded cache entry instead of both when there is one.
+    Return paths of the requested files.
+    """
+    if ch.has_entry(set_name):
+        ld.request(ch.entry_path(set_name), ch.read_entry)
+        return [ch.entry_path(set_name)]
+    paths = []
+    if ld.exists(set_file_path(set_name)):
+        ld.request(set_file_path(set_name), read_json)
+        paths.append(set_file_path(set_name))
+    if gl.sprite_atlas and ld.exists(atlas_file_path(set_name)):
+        ld.request(atlas_file_path(set_name))
+        paths.append(atlas_file_path(set_name))
+        return paths
+    if numbers is None:
+        if gl.lazy_sprites and not gl.sprite_atlas:
+            return paths  # lazy sprites decode their own files on first use
+        numbers = range(64)
+    for number in numbers:
+        if ld.exists(sprite_file_path(set_name, number)):
+            ld.request(sprite_file_path(set_name, number))
+            paths.append(sprite_file_path(set_name, number))
+    return paths
+
+
+class LevelPreload:
+    """
+    Background parsing of a level file and decoding of its sprite sets
+    (those not loaded already). step() does the rest on the main thread in
+    parts: acquires the sets and puts the loaded level into the levels
+    cache. Level.load() takes the decoded files when it comes first;
+    cancel() drops whatever is not taken.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.paths = [level_data_path(name)]  # requested files
+        self.set_names = None  # known when the level file is parsed
+        self.acquired = []  # sets held until the level is loaded
+        self.level = None
+        self.cancelled = False
+        self.lock = threading.Lock()  # sets are requested from the pool
+        ld.request(self.paths[0], self.decode)
+
+    def decode(self, path):
+        data = read_level(path)
+        with self.lock:
+            if not self.cancelled:
+                self.set_names = data["names"][:2]
+                for set_name in self.set_names:
+                    if set_name not in sprite_sets.sets:
+                        self.paths.extend(preload_sprite_set(set_name))
+        return data
+
+    def step(self):
+        """
+        Do the next part of the main thread work (when its files are
+        decoded): acquire one sprite set or load the level.
+        Return True when the level is loaded.
+        """
+        if self.level or self.cancelled:
+            return bool(self.level)
+        if not ld.is_done(self.paths[0]):
+            return False
+        if self.set_names is None:
+            # level file not read in the background (no asset loader)
+            self.set_names = read_level(self.paths[0])["names"][:2]
+        for set_name in self.set_names:
+            if set_name not in self.acquired:
+                if not all(ld.is_done(path) for path in self.paths):
+                    return False
+                sprite_sets.acquire(set_name)
+                self.acquired.append(set_name)
+                return False
+        level = Level()
+        level.load(self.name, restart=False)
+        levels.add(level)
+        self.level = level
+        self.release_sets()
+        return True
+
+    def release_sets(self):
+        for set_name in self.acquired:
+            sprite_sets.release(set_name)
+        self.acquired = []
+
+    def cancel(self):
+        """Drop requested files not taken yet and release acquired sets."""
+        with self.lock:
+            self.cancelled = True
+            for path in self.paths:
+                ld.cancel(path)
+        self.release_sets()
+
+
+def preload_level(name):
+    """Request background parsing of the level file and its sprite sets."""
+    return LevelPreload(name)
+
 
 class SpriteData:
+    # made on first use for sprites set up with load_lazy()
+    LAZY_ATTRIBUTES = ("image", "display_image", "display_area",
+                       "blit_class")
+
     def __init__(self):
         self.image = None
+        self.display_image = None  # image pre-scaled 2x for the display
+        self.display_area = None  # display_image part to use (None - whole)
+        self.blit_class = "alpha"  # display_image format, see classify()
         self.bbox = None
         self.collide = {}
         self.sidx = 0
@@ -26,16 +365,31 @@ class SpriteData:
         self.param = 0
         self.touch = 0
         self.init = 0
+        self.owner = None  # SpriteSet making images of a lazy sprite
+
+    def __getattr__(self, name):
+        # called only for missing attributes: images of a lazy sprite
+        owner = self.__dict__.get("owner")
+        if owner and name in self.LAZY_ATTRIBUTES:
+            owner.materialize(self)
+            return getattr(self, name)
+        raise AttributeError(name)
 
-    def load(self, set_name, number, status_bytes):
+    def load_lazy(self, number, status_bytes, sprite_set):
+        """
+        Set up sprite information only, images are made by
+        sprite_set.materialize() when first needed (by SpriteSet.load
+        right away when gl.lazy_sprites is off).
+        """
         self.__init__()
         self.sidx = number
-        set_file_path = os.path.join(gl.data_folder, set_name)
-        image_file_path = os.path.join(set_file_path,
-                                       set_name + "_%02d.png" % number)
-        self.image = pygame.image.load(image_file_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (gl.SPRITE_X, gl.SPRITE_Y))
-        # set up sprite information from status bytes
+        self.set_status(status_bytes)
+        for name in self.LAZY_ATTRIBUTES:
+            delattr(self, name)
+        self.owner = sprite_set
+
+    def set_status(self, status_bytes):
+        """Set up sprite information from status bytes."""
         self.flags = status_bytes[0]
         self.action = status_bytes[1] & 0x1F
         self.param = status_bytes[2]
@@ -71,15 +425,107 @@ class EmptySprite(SpriteData):
         self.image = pygame.Surface(pos)
         # pylint: enable-msg=E1121
         self.image.set_alpha(0)
+        # pylint: disable-msg=E1121
+        self.display_image = pygame.Surface((pos[0] * 2, pos[1] * 2))
+        # pylint: enable-msg=E1121
+        self.display_image.set_alpha(0)
         for col in range(4):
             self.collide["LRTB"[col]] = True
 
 
+class SpriteTable:
+    """
+    Metadata of sprites (the status bytes) as struct-of-arrays indexed by
+    sprite number, for queries over many sprites at once.
+    Arrays are NumPy arrays when NumPy is installed, array.array otherwise.
+    Values match the SpriteData attributes, the bounding box is split into
+    bbox_x, bbox_y, bbox_w, bbox_h and the collide dict is a bitmask of
+    COLLIDE_BITS.
+    """
+    COLLIDE_BITS = {"L": 0x01, "R": 0x02, "T": 0x04, "B": 0x08}
+    # column -> array.array type code (NumPy dtype of the same size)
+    COLUMNS = {"used": "B", "flags": "B", "action": "B", "param": "B",
+               "touch": "B", "init": "B", "bbox_x": "h", "bbox_y": "h",
+               "bbox_w": "h", "bbox_h": "h", "collide": "B"}
+
+    def __init__(self, status_table=(), used_table=()):
+        columns = dict((name, []) for name in self.COLUMNS)
+        for number, used in enumerate(used_table):
+            status = status_table[number * 8:number * 8 + 8]
+            columns["used"].append(int(bool(used)))
+            columns["flags"].append(status[0])
+            columns["action"].append(status[1] & 0x1F)
+            columns["param"].append(status[2])
+            columns["touch"].append(status[3])
+            columns["init"].append((status[1] & 0xE0) >> 5)
+            # same as the bbox Rect of SpriteData.set_status()
+            columns["bbox_x"].append((status[4] & 0x7F) * 2)
+            columns["bbox_y"].append((status[6] & 0x7F) * 2)
+            columns["bbox_w"].append(((status[5] & 0x7F) -
+                                      (status[4] & 0x7F)) * 2)
+            columns["bbox_h"].append(((status[7] & 0x7F) -
+                                      (status[6] & 0x7F)) * 2)
+            collide = 0
+            for col, side in enumerate("LRTB"):
+                if (status[4 + col] & 0x80) == 0:
+                    collide |= self.COLLIDE_BITS[side]
+            columns["collide"].append(collide)
+        for name, values in columns.items():
+            setattr(self, name, self.make_array(name, values))
+
+    def __len__(self):
+        return len(self.used)
+
+    @classmethod
+    def make_array(cls, name, values):
+        """Return values as the column's array."""
+        if numpy is not None:
+            return numpy.array(values, cls.COLUMNS[name])
+        return array.array(cls.COLUMNS[name], values)
+
+    @classmethod
+    def concatenate(cls, *tables):
+        """Return table with sprites of the tables one after another."""
+        table = cls()
+        for name in cls.COLUMNS:
+            values = []
+            for part in tables:
+                values.extend(getattr(part, name))
+            setattr(table, name, cls.make_array(name, values))
+        return table
+
+    def flag(self, flag_id):
+        """
+        Return flag of every sprite: bool array with NumPy,
+        list of bools otherwise.
+        """
+        mask = flag_masks[flag_id]
+        if numpy is not None:
+            return (self.flags & mask) != 0
+        return [(flags & mask) != 0 for flags in self.flags]
+
+    def numbers(self, flag_id):
+        """Return numbers of used sprites with the flag set."""
+        if numpy is not None:
+            return numpy.flatnonzero(self.flag(flag_id) & (self.used != 0))
+        return [number for number, (used, value)
+                in enumerate(zip(self.used, self.flag(flag_id)))
+                if used and value]
+
+
 class SpriteSet:
     def __init__(self):
+        self.name = None
         self.sprites = []
         self.set = None
         self.index = 0
+        self.atlas = None  # all sprites in one surface (atlas mode)
+        self.display_atlas = None  # atlas pre-scaled 2x for the display
+        self.display_fill = 0  # empty display atlas pixel
+        self.images = None  # loaded sprite images (for lazy sprites)
+        self.indexed = False  # 8-bit images (palette mode)
+        self.lazy = []  # sprites whose images may not be made yet
+        self.table = SpriteTable()  # metadata of all 64 sprites
 
     def __iter__(self):
         self.index = 0
@@ -96,21 +542,268 @@ class SpriteSet:
 
     def load(self, set_name):
         self.__init__()
-        set_file_path = os.path.join(gl.data_folder, set_name)
-        set_file_path = os.path.join(set_file_path, set_name)
-        set_file_path += ".ebs"
-        jfile = open(set_file_path, "rt")
-        self.set = json.load(jfile)
+        self.name = set_name
+        cached = ch.load_set(set_name) if ch.enabled() else None
+        if cached:
+            self.set, images = cached
+            images = [image.convert_alpha() if image else None
+                      for image in images]
+        else:
+            self.set = ld.load_asset(set_file_path(set_name), read_json)
+            if gl.lazy_sprites and not gl.sprite_atlas:
+                # every sprite decodes its own file when needed
+                images = [None] * 64
+            else:
+                images = self.load_images(set_name)
+                if ch.enabled():
+                    ch.save_set(set_name, self.set, images)
+        self.indexed = gl.sprite_palette
+        if self.indexed:
+            indexed = [to_indexed(image) if image else None
+                       for image in images]
+            if all(index or not image
+                   for image, index in zip(images, indexed)):
+                images = indexed
+            else:
+                self.leave_palette_mode()
+        self.table = SpriteTable(self.set["status table"],
+                                 self.set["used table"])
+        if gl.sprite_atlas:
+            self.atlas = images[0]
+            self.display_atlas = self.create_display_atlas()
+        else:
+            self.images = images
         for spr in range(64):
             if self.is_used(spr):
                 sprite = SpriteData()
-                sprite.load(set_name, spr, self.get_status_bytes(spr))
+                sprite.load_lazy(spr, self.get_status_bytes(spr), self)
+                self.lazy.append(sprite)
                 self.sprites.append(sprite)
             else:
                 self.sprites.append(None)
+        if not gl.lazy_sprites:
+            self.warm_up(float("inf"))
         logging.info("Sprite set '%s' loaded: %d sprites",
                      set_name, 64 - self.sprites.count(None))
 
+    def create_display_atlas(self):
+        """
+        Return empty display atlas in the cheapest format to blit the atlas
+        cells (see classify()).
+        """
+        width, height = self.atlas.get_size()
+        size = (width * 2, height * 2)
+        # pylint: disable-msg=E1121
+        if self.indexed:
+            display_atlas = pygame.Surface(size, 0, self.atlas)
+            display_atlas.set_palette(self.atlas.get_palette())
+            key = pa.TRANSPARENT
+        elif classify(self.atlas) == "alpha":
+            self.display_fill = 0
+            return pygame.Surface(size, pygame.SRCALPHA, self.atlas)
+        else:
+            display_atlas = pygame.Surface(size).convert()
+            key = COLORKEY
+        # pylint: enable-msg=E1121
+        self.display_fill = key
+        display_atlas.fill(key)
+        # no RLE, cells are blitted by parts and that makes it slower
+        display_atlas.set_colorkey(key)
+        return display_atlas
+
+    def materialize(self, sprite):
+        """Make images of the lazy sprite."""
+        number = sprite.sidx
+        if self.atlas:
+            # the cell with its gutter scales to the same pixels as in the
+            # scale2x of the whole atlas
+            cell = pygame.transform.scale2x(
+                self.atlas.subsurface(atlas_cell_rect(number, 2)))
+            cell.set_colorkey(self.atlas.get_colorkey())
+            offset = 2 * ATLAS_GUTTER * 2
+            display_image = cell.subsurface((offset, offset) +
+                                            atlas_rect(number, 4).size)
+            sprite.image = self.atlas.subsurface(atlas_rect(number, 2))
+            sprite.blit_class = classify(display_image)
+            if sprite.blit_class == "opaque":
+                # own surface, blits faster than the colorkey atlas
+                sprite.display_image = blit_surface(display_image.copy(),
+                                                    "opaque")
+                sprite.display_area = None
+            else:
+                copy = 0
+                if self.display_atlas.get_flags() & pygame.SRCALPHA:
+                    # max blending onto transparent black copies pixels
+                    copy = pygame.BLEND_RGBA_MAX
+                    sprite.blit_class = "alpha"
+                else:
+                    sprite.blit_class = "colorkey"
+                # empty first, the cell may be made again (reload_sprite)
+                self.display_atlas.fill(self.display_fill,
+                                        atlas_rect(number, 4))
+                self.display_atlas.blit(display_image,
+                                        atlas_rect(number, 4),
+                                        special_flags=copy)
+                sprite.display_image = self.display_atlas
+                sprite.display_area = atlas_rect(number, 4)
+        else:
+            image = self.images[number]
+            if image is None:
+                image = ld.load_image(sprite_file_path(self.name, number))
+                image = pygame.transform.scale(image.convert_alpha(),
+                                               (gl.SPRITE_X, gl.SPRITE_Y))
+                image = self.index_image(image)
+                self.images[number] = image
+            sprite.image = image
+            sprite.blit_class = classify(image)
+            sprite.display_image = blit_surface(
+                pygame.transform.scale2x(image), sprite.blit_class)
+            sprite.display_area = None
+        sprite.owner = None
+
+    def index_image(self, image):
+        """
+        Return the image as 8-bit surface in palette mode, otherwise (or
+        when it has colours out of the palette) the image itself.
+        """
+        if not self.indexed:
+            return image
+        indexed = to_indexed(image)
+        if indexed is None:
+            self.leave_palette_mode()
+            return image
+        return indexed
+
+    def leave_palette_mode(self):
+        """
+        Keep the set's images 32-bit, not all of them are palette colours.
+        Images already made 8-bit are converted back.
+        """
+        logging.warning("Sprite set '%s' has colours out of the VGA "
+                        "palette, using 32-bit images", self.name)
+        self.indexed = False
+        if self.atlas:
+            self.atlas = self.atlas.convert_alpha()
+            self.display_atlas = self.create_display_atlas()
+        elif self.images:
+            self.images = [image.convert_alpha() if image else None
+                           for image in self.images]
+        for sprite in self.sprites:
+            if sprite and not sprite.owner:
+                self.materialize(sprite)
+
+    def reload_sprite(self, number):
+        """
+        Reload sprite[number] from its (loose) source PNG. Its SpriteData
+        is updated in place, so entities using it show the new image.
+        """
+        image = pygame.image.load(sprite_file_path(self.name, number))
+        image = image.convert_alpha()
+        if self.atlas:
+            rect = atlas_cell_rect(number, 2)
+            # pylint: disable-msg=E1121
+            cell = pygame.Surface(rect.size, pygame.SRCALPHA, 32)
+            # pylint: enable-msg=E1121
+            put_atlas_cell(cell, 0, image, 2)  # cell 0 starts at the gutter
+            cell = self.index_image(cell)
+            if self.indexed:
+                cell.set_colorkey(None)  # copy transparent pixels too
+                self.atlas.blit(cell, rect)
+            else:
+                self.atlas.fill((0, 0, 0, 0), rect)
+                self.atlas.blit(cell, rect,
+                                special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            image = pygame.transform.scale(image, (gl.SPRITE_X, gl.SPRITE_Y))
+            self.images[number] = self.index_image(image)
+        sprite = self.sprites[number]
+        if sprite is None:
+            sprite = SpriteData()
+            sprite.load_lazy(number, self.get_status_bytes(number), self)
+            self.sprites[number] = sprite
+            self.lazy.append(sprite)
+        elif not sprite.owner:
+            self.materialize(sprite)
+        logging.info("Sprite '%s' %d reloaded", self.name, number)
+
+    def reload_set_file(self):
+        """
+        Reread the (loose) .ebs file. Information of loaded sprites is
+        updated in place, newly used sprites are loaded.
+        """
+        self.set = read_json_file(set_file_path(self.name))
+        self.table = SpriteTable(self.set["status table"],
+                                 self.set["used table"])
+        for number in range(64):
+            if not self.is_used(number):
+                self.sprites[number] = None
+            elif self.sprites[number]:
+                self.sprites[number].set_status(self.get_status_bytes(number))
+            else:
+                self.reload_sprite(number)
+        logging.info("Sprite set '%s' reloaded", self.name)
+
+    def warm_up(self, deadline):
+        """
+        Make images of lazy sprites until time.perf_counter() reaches
+        the deadline. Return True when all sprites are done.
+        """
+        while self.lazy:
+            if time.perf_counter() >= deadline:
+                return False
+            sprite = self.lazy.pop()
+            if sprite.owner:
+                self.materialize(sprite)
+        return True
+
+    def load_images(self, set_name):
+        """
+        Return decoded and scaled images of the set: [atlas] in atlas mode,
+        otherwise image for every sprite slot (None for unused ones).
+        """
+        if gl.sprite_atlas:
+            return [self.load_atlas(set_name)]
+        images = []
+        for spr in range(64):
+            image = None
+            if self.is_used(spr):
+                image = ld.load_image(sprite_file_path(set_name, spr))
+                image = pygame.transform.scale(image.convert_alpha(),
+                                               (gl.SPRITE_X, gl.SPRITE_Y))
+            images.append(image)
+        return images
+
+    def load_atlas(self, set_name):
+        """
+        Return the whole set as one (scaled) atlas surface.
+        Uses prebuilt <set>_atlas.png when present (see create_atlases.py),
+        otherwise packs the separate sprite PNGs in memory.
+        """
+        path = atlas_file_path(set_name)
+        if ld.exists(path):
+            source = ld.load_image(path)
+        else:
+            source = build_atlas(set_name, self.set["used table"])
+        source = source.convert_alpha()
+        width, height = source.get_size()
+        return pygame.transform.scale(source, (width * 2, height * 2))
+
+    def get_memory_size(self):
+        """Return bytes of pixel data held by the set's surfaces."""
+        surfaces = {}
+        for surface in (self.atlas, self.display_atlas):
+            if surface:
+                surfaces[id(surface)] = surface
+        for sprite in self.sprites:
+            if sprite and not sprite.owner:  # lazy sprites have no images
+                # atlas subsurfaces share pixels with the atlas
+                for surface in (sprite.image, sprite.display_image):
+                    while surface.get_parent():
+                        surface = surface.get_parent()
+                    surfaces[id(surface)] = surface
+        return sum(s.get_width() * s.get_height() * s.get_bytesize()
+                   for s in surfaces.values())
+
     def get_status_bytes(self, sprite):
         return self.set["status table"][sprite * 8:sprite * 8 + 8]
 
@@ -130,11 +823,353 @@ class SpriteSet:
         return anim
 
 
+class SpriteSetRegistry:
+    """
+    Loaded sprite sets shared by name, so a set used by several levels
+    (or reloaded level) is decoded only once.
+    Counts references of every set; sets nobody references stay loaded
+    until they (least recently used first) exceed gl.sprite_set_budget.
+    Singleton by design (sprite_sets below).
+    """
+    def __init__(self):
+        self.sets = collections.OrderedDict()  # name -> SpriteSet, LRU first
+        self.references = collections.Counter()
+
+    def acquire(self, set_name):
+        """Return loaded set, adding a reference to it."""
+        if set_name in self.sets:
+            self.sets.move_to_end(set_name)
+            logging.debug("Sprite set '%s' reused", set_name)
+        else:
+            sprite_set = SpriteSet()
+            sprite_set.load(set_name)
+            self.sets[set_name] = sprite_set
+        self.references[set_name] += 1
+        self.evict()
+        return self.sets[set_name]
+
+    def release(self, set_name):
+        """Remove reference to the set (it stays loaded until evicted)."""
+        assert self.references[set_name] > 0
+        self.references[set_name] -= 1
+
+    def get_memory_size(self):
+        return sum(s.get_memory_size() for s in self.sets.values())
+
+    def warm_up(self, seconds):
+        """Make lazy sprite images for given time, recent sets first."""
+        deadline = time.perf_counter() + seconds
+        for sprite_set in reversed(self.sets.values()):
+            if not sprite_set.warm_up(deadline):
+                break
+
+    def evict(self):
+        """Drop least recently used unreferenced sets over the budget."""
+        unused = [name for name in self.sets if not self.references[name]]
+        # sizes grow as lazy sprites get their images
+        sizes = dict((name, self.sets[name].get_memory_size())
+                     for name in unused)
+        size = sum(sizes.values())
+        for name in unused:
+            if size <= gl.sprite_set_budget:
+                break
+            size -= sizes[name]
+            del self.sets[name]
+            del self.references[name]
+            logging.info("Sprite set '%s' evicted", name)
+
+    def clear(self):
+        self.__init__()
+
+
+sprite_sets = SpriteSetRegistry()
+
+
+def level_signature(name):
+    """Return (path, modification time) of the level file to read."""
+    path = level_data_path(name)
+    return path, lb.modification_time(path)
+
+
 class Screen:
+    """
+    Entities of a screen: level data (built by Level.build_screen) or the
+    runtime screen being played, sharing background and collisions lists
+    with its source level screen (ScreenManager.change_screen).
+    Collision rects and backdrop are prepared once for the lists they are
+    made of and used only while the screen still has those lists.
+    Active entities of level screens are added and removed by add() and
+    remove(), which keep them indexed by the position they were added at.
+    The active list is shared too until either screen changes it (copy on
+    write): runtime screens change it by append_active(), extend_active()
+    and remove_active() only.
+    """
     def __init__(self):
         self.background = []
         self.collisions = []
         self.active = []
+        self.placed = {}  # active entity -> (x, y) it was added at
+        self.cells = {}  # (x, y) -> active entities added there, in order
+        self.shared_active = False  # active list used by a runtime screen
+        self.source = None  # level screen of the runtime screen
+        self.collision_rects = None  # (collisions, rects)
+        self.backdrop = None  # (background, collisions, surface)
+
+    def unshare_active(self):
+        """Give the level screen its own copy of a shared active list."""
+        if self.shared_active:
+            self.active = list(self.active)
+            self.shared_active = False
+
+    def write_active(self):
+        """
+        Make the runtime screen's active list its own before changing it.
+        The level screen takes the copy: the list being iterated by the
+        update loop stays the one changed.
+        """
+        if self.source and self.active is self.source.active:
+            self.source.unshare_active()
+
+    def append_active(self, entity):
+        self.write_active()
+        self.active.append(entity)
+
+    def extend_active(self, entities):
+        self.write_active()
+        self.active.extend(entities)
+
+    def remove_active(self, entity):
+        """Remove entity from the runtime screen (ValueError if not here)."""
+        self.write_active()
+        self.active.remove(entity)
+
+    def add(self, entity):
+        """Append the active entity, indexed by its current position."""
+        key = (entity.position.x, entity.position.y)
+        self.unshare_active()
+        self.active.append(entity)
+        self.placed[entity] = key
+        self.cells.setdefault(key, []).append(entity)
+
+    def remove(self, entity):
+        """Remove the active entity. Return False when it is not here."""
+        key = self.placed.pop(entity, None)
+        if key is None:
+            return False
+        cell = self.cells[key]
+        cell.remove(entity)
+        if not cell:
+            del self.cells[key]
+        self.unshare_active()
+        self.active.remove(entity)
+        return True
+
+    def find(self, position):
+        """Return the first active entity added at the position or None."""
+        cell = self.cells.get((position[0], position[1]))
+        return cell[0] if cell else None
+
+    def get_collision_rects(self):
+        """
+        Return bounding boxes of the collisions placed on the screen
+        (same order as collisions, for Rect.collidelistall()).
+        """
+        if self.source and self.collisions is self.source.collisions:
+            return self.source.get_collision_rects()
+        if (self.collision_rects is None or
+                self.collision_rects[0] is not self.collisions):
+            rects = [obj.get_bbox().move(obj.get_position())
+                     for obj in self.collisions]
+            self.collision_rects = (self.collisions, rects)
+        return self.collision_rects[1]
+
+    def get_backdrop(self):
+        """Return prepared backdrop surface of the screen or None."""
+        screen = self
+        if (self.source and self.background is self.source.background and
+                self.collisions is self.source.collisions):
+            screen = self.source
+        backdrop = screen.backdrop
+        if (backdrop and backdrop[0] is screen.background and
+                backdrop[1] is screen.collisions):
+            return backdrop[2]
+        return None
+
+    def prepare(self):
+        """Make collision rects and backdrop (background and collisions)."""
+        self.get_collision_rects()
+        if self.get_backdrop() is None:
+            self.backdrop = (self.background, self.collisions,
+                             di.make_backdrop(self.background +
+                                              self.collisions))
+
+    def discard_prepared(self):
+        """Drop prepared state (sprites of the entities changed)."""
+        self.collision_rects = None
+        self.backdrop = None
+
+
+SCREEN_MEMORY_SIZE = 40 * 1024  # estimated bytes of a built screen
+
+
+class LazyScreens(collections.abc.Sequence):
+    """
+    All 256 screens of a level, each built by Level.build_screen on first
+    access (None for empty ones). A player visits few screens between
+    level loads and respawns, the rest are never built.
+    Entities of a built screen are shared with the screen being played,
+    so every built screen may have changed: reset() builds only them
+    again.
+    """
+    NOT_BUILT = object()
+
+    def __init__(self, level):
+        self.level = level
+        self.screens = [self.NOT_BUILT] * 256
+
+    def __len__(self):
+        return len(self.screens)
+
+    def __getitem__(self, screen_number):
+        screen = self.screens[screen_number]
+        if screen is self.NOT_BUILT:
+            # building reseeds and draws random numbers, keep the game's
+            # sequence as if the screen had been built with the level
+            seed, randoms = gl.rand_seed, gl.screen_randoms[:]
+            screen = self.level.build_screen(screen_number)
+            gl.srand(seed)
+            gl.screen_randoms[:] = randoms
+            self.screens[screen_number] = screen
+        return screen
+
+    def __setitem__(self, screen_number, screen):
+        self.screens[screen_number] = screen
+
+    def invalidate(self, screen_number):
+        """Build the screen again on next access."""
+        self.screens[screen_number] = self.NOT_BUILT
+
+    def is_built(self, screen_number):
+        return self.screens[screen_number] is not self.NOT_BUILT
+
+    def built_count(self):
+        return len(self.screens) - self.screens.count(self.NOT_BUILT)
+
+    def build_all(self):
+        for screen_number in range(len(self.screens)):
+            self[screen_number]
+
+    def discard_prepared(self):
+        """Drop prepared state of the built screens."""
+        for screen in self.screens:
+            if screen and screen is not self.NOT_BUILT:
+                screen.discard_prepared()
+
+    def reset(self):
+        """
+        Make screens pristine again: the built ones are built again on next
+        access. Return number of the screens.
+        """
+        count = self.built_count()
+        self.screens = [self.NOT_BUILT] * len(self.screens)
+        return count
+
+
+class Blueprint:
+    """
+    Precomputed entity of a level sprite number: the prototype (class,
+    sprites, frame, projectile sprite...) is cloned for every cell of the
+    sprite, only position dependent fields are filled in.
+    """
+    def __init__(self, prototype, delay=None, following=None,
+                 group="active"):
+        self.prototype = prototype
+        self.group = group  # Screen list: background, collisions or active
+        self.delay = delay  # (mode, param) of set_initial_delay()
+        self.following = following  # (Blueprint, offset) of additional one
+
+    def create(self, position):
+        """Return new entity at the position."""
+        entity = object.__new__(self.prototype.__class__)
+        entity.__dict__.update(self.prototype.__dict__)
+        entity.position = position
+        if self.delay:
+            # may draw random numbers, in the same order as building did
+            entity.set_initial_delay(*self.delay)
+        return entity
+
+
+class LevelCache:
+    """
+    Recently played levels kept loaded, so switching back to one costs a
+    reset of its screens instead of reading and building it again.
+    Besides the current level keeps gl.level_cache_size levels (least
+    recently used dropped first) within gl.level_cache_budget bytes
+    (sprite sets shared by levels are counted for each of them).
+    Cached levels keep their sprite sets acquired.
+    Singleton by design (levels below).
+    """
+    def __init__(self):
+        self.levels = collections.OrderedDict()  # name -> Level, LRU first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        """Return the level made pristine, loading it when not cached."""
+        if self.levels:
+            # the level played so far, free its built screens
+            next(reversed(self.levels.values())).screens.reset()
+        level = self.levels.pop(name, None)
+        if level is not None and level.signature == level_signature(name):
+            self.hits += 1
+            level.reset_screens()
+            result = "hit"
+        else:
+            if level is not None:
+                level.release_sets()  # level file changed
+            self.misses += 1
+            level = Level()
+            level.load(name)
+            result = "miss"
+        self.levels[name] = level
+        self.evict()
+        logging.info("Level cache %s '%s': %d hits, %d misses, %d cached",
+                     result, name, self.hits, self.misses, len(self.levels))
+        return level
+
+    def add(self, level):
+        """Add loaded level as the most recent one after the current."""
+        current = next(reversed(self.levels), None)
+        self.levels[level.name] = level
+        if current is not None:
+            self.levels.move_to_end(current)
+        self.evict()
+
+    def get_memory_size(self):
+        return sum(level.get_memory_size() for level in self.levels.values())
+
+    def evict(self):
+        """Drop least recently used levels over the size or the budget."""
+        names = list(self.levels)[:-1]  # never the current level
+        sizes = dict((name, self.levels[name].get_memory_size())
+                     for name in names)
+        size = sum(sizes.values())
+        for index, name in enumerate(names):
+            if (len(names) - index <= gl.level_cache_size and
+                    size <= gl.level_cache_budget):
+                break
+            size -= sizes[name]
+            self.levels.pop(name).release_sets()
+            logging.info("Level '%s' evicted from the cache", name)
+
+    def clear(self):
+        """Drop all levels, releasing their sprite sets."""
+        for level in self.levels.values():
+            level.release_sets()
+        self.__init__()
+
+
+levels = LevelCache()
 
 
 class LevelData:
@@ -142,10 +1177,7 @@ class LevelData:
         self.data = []
 
     def load(self, filename):
-        level_file_path = os.path.join(gl.data_folder, filename)
-        level_file_path += ".ebl"
-        jfile = open(level_file_path, "rt")
-        self.data = json.load(jfile)
+        self.data = ld.load_asset(level_data_path(filename), read_level)
 
 
 #noinspection PyArgumentEqualDefault
@@ -154,9 +1186,18 @@ class Level(LevelData):
         LevelData.__init__(self)
         self.set1 = SpriteSet()
         self.set2 = SpriteSet()
+        self.set_names = []  # sets acquired from the sprite_sets registry
+        self.sprite_table = SpriteTable()  # metadata of sprites 0-127
+        self.anim_ends = []  # (start, end) of every sprite's animation
+        self.anims = {}  # (start, end) -> tuple of the animation's sprites
+        self.blueprints = [None] * 128  # Blueprint of every sprite number
         self.screens = []
         self.start = None
+        self.teleports = {}  # screen number -> {x: set of teleport y}
+        self.teleport_links = {}  # (screen number, x, y) -> teleport target
+        self.graph = None  # emgraph.ScreenGraph made by get_graph()
         self.name = None
+        self.signature = None  # level file read (path, modification time)
         self.init_functions = {1: self.__init_cycle,
                                2: self.__init_pulse,
                                3: self.__init_monitor,
@@ -179,226 +1220,470 @@ class Level(LevelData):
                                21: self.__init_flashspecial}
 
 
-    def __init_cycle(self, sidx, position):
+    def __init_cycle(self, sidx):
         ends = self.get_anim_ends(sidx)
         sprites = self.get_anim(ends)
-        entity = ga.Cycle(sprites, position)
+        entity = ga.Cycle(sprites, XY(0, 0))
         entity.frame = sidx - ends[0]
-        entity.set_initial_delay(self.get_sprite(sidx).init,
-                                 self.get_sprite(sidx).param)
-        return entity
+        return Blueprint(entity, (self.get_sprite(sidx).init,
+                                  self.get_sprite(sidx).param))
 
-    def __init_cycleplus(self, sidx, position):
+    def __init_cycleplus(self, sidx):
         ends = self.get_anim_ends(sidx)
         sprites = self.get_anim(ends)
-        entity = ga.CyclePlus(sprites, position)
+        entity = ga.CyclePlus(sprites, XY(0, 0))
         preceeding = self.get_sprite(ends[0] - 1)
         entity.empty_delay = preceeding.param
-        entity.set_initial_delay(self.get_sprite(sidx).init, preceeding.param)
-        return entity
+        return Blueprint(entity, (self.get_sprite(sidx).init,
+                                  preceeding.param))
 
-    def __init_pulse(self, sidx, position):
+    def __init_pulse(self, sidx):
         ends = self.get_anim_ends(sidx)
         sprites = self.get_anim(ends)
-        entity = ga.Pulse(sprites, position)
+        entity = ga.Pulse(sprites, XY(0, 0))
         entity.frame = sidx - ends[0]
-        entity.set_initial_delay(self.get_sprite(sidx).init,
-                                 self.get_sprite(sidx).param)
-        return entity
+        return Blueprint(entity, (self.get_sprite(sidx).init,
+                                  self.get_sprite(sidx).param))
 
-    def __init_pulseplus(self, sidx, position):
+    def __init_pulseplus(self, sidx):
         ends = self.get_anim_ends(sidx)
         sprites = self.get_anim(ends)
-        entity = ga.PulsePlus(sprites, position)
+        entity = ga.PulsePlus(sprites, XY(0, 0))
         preceeding = self.get_sprite(ends[0] - 1)
         entity.empty_delay = preceeding.param
-        entity.set_initial_delay(self.get_sprite(sidx).init, preceeding.param)
-        return entity
+        return Blueprint(entity, (self.get_sprite(sidx).init,
+                                  preceeding.param))
 
-    def __init_flash(self, sidx, position):
+    def __init_flash(self, sidx):
         sprite = self.get_sprite(sidx)
-        entity = ga.Flash([sprite], position)
-        entity.set_initial_delay(sprite.init, sprite.param)
-        return entity
+        entity = ga.Flash(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity, (sprite.init, sprite.param))
 
-    def __init_flashspecial(self, sidx, position):
+    def __init_flashspecial(self, sidx):
         sprite = self.get_sprite(sidx)
-        entity = ga.FlashSpecial([sprite], position)
-        entity.set_initial_delay(sprite.init, sprite.param)
-        return entity
+        entity = ga.FlashSpecial(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity, (sprite.init, sprite.param))
 
-    def __init_flashplus(self, sidx, position):
+    def __init_flashplus(self, sidx):
         sprite = self.get_sprite(sidx)
-        entity = ga.FlashPlus([sprite], position)
-        entity.set_initial_delay(sprite.init, sprite.param)
-        return entity
+        entity = ga.FlashPlus(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity, (sprite.init, sprite.param))
 
-    def __init_display(self, sidx, position):
-        sprite = self.get_sprite(sidx)
-        entity = ga.Display([sprite], position)
-        return entity
+    def __init_display(self, sidx):
+        entity = ga.Display(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity)
 
-    def __init_monitor(self, sidx, position):
+    def __init_monitor(self, sidx):
         # it doesn't seem to be used
-        sprite = self.get_sprite(sidx)
-        entity = ga.Monitor([sprite], position)
-        return entity
+        entity = ga.Monitor(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity)
 
-    def __init_rocketup(self, sidx, position):
-        sprite = self.get_sprite(sidx)
-        entity = ga.RocketUp([sprite], position)
-        return entity
+    def __init_rocketup(self, sidx):
+        entity = ga.RocketUp(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity)
 
-    def __init_rocketdown(self, sidx, position):
-        sprite = self.get_sprite(sidx)
-        entity = ga.RocketDown([sprite], position)
-        return entity
+    def __init_rocketdown(self, sidx):
+        entity = ga.RocketDown(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity)
 
-    def __init_killingfloor(self, sidx, position):
-        sprite = self.get_sprite(sidx)
-        entity = ga.KillingFloor([sprite], position)
-        return entity
+    def __init_killingfloor(self, sidx):
+        entity = ga.KillingFloor(self.get_anim((sidx, sidx)), XY(0, 0))
+        return Blueprint(entity)
 
-    def __init_checkpoint(self, sidx, position):
+    def __init_checkpoint(self, sidx):
         ends = self.get_anim_ends(sidx)
         sprites = self.get_anim(ends)
-        entity = ga.Checkpoint(sprites, position)
+        entity = ga.Checkpoint(sprites, XY(0, 0))
         entity.frame = sidx - ends[0]
-        return entity
+        return Blueprint(entity)
 
-    def __init_teleport(self, sidx, position):
+    def __init_teleport(self, sidx):
         sprite = self.get_sprite(sidx)
-        base = ga.Teleport([sprite], position)
+        base = ga.Teleport(self.get_anim((sidx, sidx)), XY(0, 0))
         if sprite.param == 1:
-            position += XY(0, -gl.SPRITE_Y)
-            sidx = self.get_anim_ends(sidx)[1] + 1
-            # signal that another object needs to instantiated
-            return base, sidx, position
-        return base
+            # another object needs to be instantiated above
+            following = self.__get_active_blueprint(
+                self.get_anim_ends(sidx)[1] + 1)
+            return Blueprint(base, following=(following, XY(0, -gl.SPRITE_Y)))
+        return Blueprint(base)
 
-    def __init_exit(self, sidx, position):
-        sprite = self.get_sprite(sidx)
+    def __init_exit(self, sidx):
         # Also load the next sprite (sidx+1) which is the indicator (yellow triangle)
         indicator_sprite = self.get_sprite(sidx + 1)
-        entity = ga.Exit([sprite], position)
+        entity = ga.Exit(self.get_anim((sidx, sidx)), XY(0, 0))
         # Pass the indicator sprite separately
         entity.indicator_sprite = indicator_sprite
-        return entity
+        return Blueprint(entity)
 
-    def __init_cannonleft(self, sidx, position):
+    def __init_cannon(self, sidx, cannon_class):
         # Load cannon animation and get projectile sprite (last in sequence)
         ends = self.get_anim_ends(sidx)
         sprites = self.get_anim(ends)
-        entity = ga.CannonLeft(sprites, position)
+        entity = cannon_class(sprites, XY(0, 0))
         entity.frame = sidx - ends[0]  # Current frame within animation
         # Projectile sprite is the LAST sprite in animation (EB_ENEM.C:656-657)
         entity.projectile_sprite = sprites[-1] if sprites else None
-        return entity
+        return Blueprint(entity)
 
-    def __init_cannonright(self, sidx, position):
-        ends = self.get_anim_ends(sidx)
-        sprites = self.get_anim(ends)
-        entity = ga.CannonRight(sprites, position)
-        entity.frame = sidx - ends[0]
-        entity.projectile_sprite = sprites[-1] if sprites else None
-        return entity
+    def __init_cannonleft(self, sidx):
+        return self.__init_cannon(sidx, ga.CannonLeft)
 
-    def __init_cannonup(self, sidx, position):
-        ends = self.get_anim_ends(sidx)
-        sprites = self.get_anim(ends)
-        entity = ga.CannonUp(sprites, position)
-        entity.frame = sidx - ends[0]
-        entity.projectile_sprite = sprites[-1] if sprites else None
-        return entity
+    def __init_cannonright(self, sidx):
+        return self.__init_cannon(sidx, ga.CannonRight)
 
-    def __init_cannondown(self, sidx, position):
-        ends = self.get_anim_ends(sidx)
-        sprites = self.get_anim(ends)
-        entity = ga.CannonDown(sprites, position)
-        entity.frame = sidx - ends[0]
-        entity.projectile_sprite = sprites[-1] if sprites else None
-        return entity
+    def __init_cannonup(self, sidx):
+        return self.__init_cannon(sidx, ga.CannonUp)
+
+    def __init_cannondown(self, sidx):
+        return self.__init_cannon(sidx, ga.CannonDown)
 
-    def __init_enemy(self, sidx, position):
+    def __init_enemy(self, sidx):
         sprite = self.get_sprite(sidx)
         num = (sprite.param & 0x7F) // 3
         anims, frames = gl.enemies.get_anims(num)
+        sprites = self.get_anim((sidx, sidx))
         if num == 2:  # enemy types can be hardcoded
-            entity = ga.EnemyFlying([sprite], position)
+            entity = ga.EnemyFlying(sprites, XY(0, 0))
         else:
-            entity = ga.EnemyPlatform([sprite], position)
+            entity = ga.EnemyPlatform(sprites, XY(0, 0))
         entity.shoots = (sprite.param & 0x80) != 0
         entity.anims = anims
         entity.frames = frames
-        return entity
+        return Blueprint(entity)
 
-    def __get_active_entity(self, sidx, position):
+    def __get_active_blueprint(self, sidx):
         sprite = self.get_sprite(sidx)
         action = sprite.action
-        return self.init_functions.get(action, self.__init_display)(sidx,
-                                                                    position)
+        return self.init_functions.get(action, self.__init_display)(sidx)
 
-    def load(self, name):
+    def get_blueprint(self, sidx):
+        """Return Blueprint of the sprite number (made on first use)."""
+        blueprint = self.blueprints[sidx]
+        if blueprint is None:
+            sprite = self.get_sprite(sidx)
+            flags = sprite.flags
+            if (flags == 0x80) & (sprite.action == 0):
+                blueprint = Blueprint(
+                    ga.Entity(self.get_anim((sidx, sidx)), XY(0, 0)),
+                    group="collisions")
+            elif flags & 0x80:
+                blueprint = self.__get_active_blueprint(sidx)
+            else:
+                blueprint = Blueprint(
+                    ga.Entity(self.get_anim((sidx, sidx)), XY(0, 0)),
+                    group="background")
+            self.blueprints[sidx] = blueprint
+        return blueprint
+
+    def load(self, name, restart=True):
+        previous_sets = self.set_names
         self.__init__()
         self.name = name
+        self.signature = level_signature(name)
         LevelData.load(self, name)
+        self.build(previous_sets, restart)
+
+    def release_sets(self):
+        """Release the level's sprite sets (the level is not used anymore)."""
+        for set_name in self.set_names:
+            sprite_sets.release(set_name)
+        self.set_names = []
+
+    def get_memory_size(self):
+        """
+        Return bytes held by the level: tile data, built screens' entities
+        (estimated) and pixel data of its sprite sets.
+        """
+        size = 0
+        for layers in self.data["screens"]:
+            for layer in layers or ():
+                if isinstance(layer, memoryview):
+                    size += layer.nbytes
+                elif layer:
+                    size += sys.getsizeof(layer)
+        if isinstance(self.screens, LazyScreens):
+            size += self.screens.built_count() * SCREEN_MEMORY_SIZE
+        for set_name in self.set_names:
+            size += sprite_sets.sets[set_name].get_memory_size()
+        return size
+
+    def build(self, previous_sets=(), restart=True):
+        """
+        Acquire sprite sets of the loaded data and create its screens.
+        Update gl.checkpoint to the level start when restart is True.
+        """
         set1_name = self.data["names"][0]
         set2_name = self.data["names"][1]
         assert set1_name != "" and set2_name != ""
-        self.set1.load(set1_name)
-        self.set2.load(set2_name)
-        cntr = 0
-        for s in range(256):
-            gl.init_screen_randoms(s)
-            layers = self.data["screens"][s]
-            if layers:
-                screen = Screen()
-                for lay in range(4):
-                    layer = layers[lay]
-                    if layer:
-                        for y in range(gl.SCREEN_Y):
-                            for x in range(gl.SCREEN_X):
-                                sidx = layer[y * gl.SCREEN_X + x]
-                                if sidx != 0:
-                                    self.process(screen, sidx, x, y, s)
-                self.screens.append(screen)
-                cntr += 1
-            else:
-                self.screens.append(None)
-        logging.info("Level '%s' loaded: %d screens", name, cntr)
+        self.set_names = [set1_name, set2_name]
+        self.set1 = sprite_sets.acquire(set1_name)
+        self.set2 = sprite_sets.acquire(set2_name)
+        self.update_sprite_table()
+        # released after acquiring, reloaded level keeps its sets
+        for set_name in previous_sets:
+            sprite_sets.release(set_name)
+        self.screens = self.create_screens()
+        if restart:
+            self.restart()
+        logging.info("Level '%s' loaded: %d screens", self.name,
+                     self.screen_count())
+
+    def create_screens(self):
+        """
+        Return LazyScreens of the level data, find the level start and
+        link the teleports (screens are built when gl.lazy_screens is off
+        only).
+        """
+        screens = LazyScreens(self)
+        self.start = None
+        self.find_start()
+        self.index_teleports()
+        if not gl.lazy_screens:
+            screens.build_all()
+        return screens
+
+    def screen_count(self):
+        """Return number of non-empty screens (from the level data)."""
+        return sum(1 for s in range(256) if self.has_screen(s))
+
+    def has_screen(self, screen_number):
+        """Return True when the screen is not empty (without building it)."""
+        return bool(self.data["screens"][screen_number])
+
+    def get_graph(self):
+        """
+        Return emgraph.ScreenGraph of the level: screen openings and links
+        (read from the level's graph file or analysed on first use).
+        """
+        if self.graph is None:
+            paths = [level_data_path(self.name)]
+            paths.extend(set_file_path(set_name)
+                         for set_name in self.set_names)
+            self.graph = gr.load_graph(self.name, paths,
+                                       self.data["screens"],
+                                       self.sprite_table)
+        return self.graph
+
+    def find_start(self, screen_numbers=range(256)):
+        """
+        Find the level start: the active checkpoint (param 1) found by
+        a pass over the tile data of the screens, the same way building
+        them would. The start is kept in self.start, return True when found.
+        """
+        # sprite number -> vertical offset of the checkpoint made for it
+        table = self.sprite_table
+        starts = {}
+        for sidx in range(1, len(table)):
+            flags, action = table.flags[sidx], table.action[sidx]
+            if not table.used[sidx] or not flags & 0x80 or \
+                    table.param[sidx] != 1 or (flags == 0x80 and action == 0):
+                continue
+            if action == 12:
+                starts[sidx] = 0
+            elif action == 13:
+                # teleport with param 1 makes also the next anim's object
+                following = self.get_anim_ends(sidx)[1] + 1
+                if following < len(table) and table.used[following] and \
+                        table.action[following] == 12:
+                    starts[sidx] = -gl.SPRITE_Y
+        if not starts:
+            return False
+        found = False
+        level_number = gl.level_names.index(self.name)
+        for screen_number in screen_numbers:
+            layers = self.data["screens"][screen_number]
+            for layer in layers or ():
+                if not layer or starts.keys().isdisjoint(layer):
+                    continue
+                for cell, sidx in enumerate(layer):
+                    if sidx in starts:
+                        position = XY(cell % gl.SCREEN_X * gl.SPRITE_X,
+                                      cell // gl.SCREEN_X * gl.SPRITE_Y +
+                                      starts[sidx])
+                        self.start = (level_number, screen_number,
+                                      position)
+                        found = True
+        return found
+
+    def index_teleports(self):
+        """
+        Find positions of all teleports by a pass over the tile data (they
+        are never destroyed) and make the teleport link table: the target
+        of the object made above every teleport, touched to teleport.
+        """
+        table = self.sprite_table
+        numbers = set(sidx for sidx in range(1, len(table))
+                      if table.used[sidx] and table.flags[sidx] & 0x80 and
+                      table.action[sidx] == 13)
+        self.teleports = {}
+        self.teleport_links = {}
+        touched = []  # (screen number, position) of the objects above
+        for screen_number in range(256):
+            layers = self.data["screens"][screen_number]
+            for layer in layers or ():
+                if not layer or numbers.isdisjoint(layer):
+                    continue
+                columns = self.teleports.setdefault(screen_number, {})
+                for cell, sidx in enumerate(layer):
+                    if sidx not in numbers:
+                        continue
+                    position = XY(cell % gl.SCREEN_X * gl.SPRITE_X,
+                                  cell // gl.SCREEN_X * gl.SPRITE_Y)
+                    columns.setdefault(position.x, set()).add(position.y)
+                    following = self.get_blueprint(sidx).following
+                    if following:
+                        blueprint, offset = following
+                        above = position + offset
+                        touched.append((screen_number, above))
+                        if isinstance(blueprint.prototype, ga.Teleport):
+                            columns.setdefault(above.x, set()).add(above.y)
+        for screen_number, position in touched:
+            self.get_teleport_target(screen_number, position)
+
+    def get_teleport_target(self, screen_number, position):
+        """
+        Return (screen number, position) of the teleport target for
+        the object at the position: the first teleport above it in the same
+        column, then in the screens above (wrapping around the map boundary
+        and continuing from the bottom). None when the column has none.
+        """
+        key = (screen_number, position.x, position.y)
+        if key in self.teleport_links:
+            return self.teleport_links[key]
+        target = None
+        x, top = position.x, position.y
+        # every screen of the map column, ending with the first one again
+        for step in range(256 // 16 + 1):
+            ys = self.teleports.get(screen_number, {}).get(x)
+            if ys:
+                for y in range(top, 0, -gl.SPRITE_Y):
+                    if y in ys:
+                        target = (screen_number, XY(x, y))
+                        break
+                if target:
+                    break
+            top = (gl.SCREEN_Y + 1) * gl.SPRITE_Y
+            screen_number = (screen_number - 16) % 256
+        self.teleport_links[key] = target
+        return target
+
+    def restart(self):
+        """Update gl.checkpoint to the level start (only if different)."""
+        if self.start is None:
+            return
+        level_number, screen_number, position = self.start
+        if (gl.checkpoint.get_level() != level_number or
+            gl.checkpoint.get_screen() != screen_number or
+            gl.checkpoint.get_position() != position):
+            gl.checkpoint.update(level_number, screen_number, position)
+
+    def build_screen(self, screen_number):
+        """Return Screen made from the level data (None for empty one)."""
+        gl.init_screen_randoms(screen_number)
+        layers = self.data["screens"][screen_number]
+        if not layers:
+            return None
+        screen = Screen()
+        for lay in range(4):
+            layer = layers[lay]
+            if layer:
+                # cells are stored row by row
+                for cell, sidx in enumerate(layer):
+                    if sidx != 0:
+                        self.process(screen, sidx, cell % gl.SCREEN_X,
+                                     cell // gl.SCREEN_X, screen_number)
+        return screen
+
+    def update_sprite_table(self):
+        """
+        Rebuild sprite_table and the animation index of both sets.
+        Prepared state of the built screens is dropped and teleports of
+        the created ones linked again.
+        """
+        self.sprite_table = SpriteTable.concatenate(self.set1.table,
+                                                    self.set2.table)
+        self.index_anims()
+        self.graph = None
+        if self.screens:
+            self.screens.discard_prepared()
+            self.index_teleports()
+
+    def index_anims(self):
+        """
+        Compute anim_ends of all sprite numbers and the anims sprite tuples,
+        same as walking to the first and last frame flags of the sprites.
+        Blueprints made of the previous sprites are dropped.
+        """
+        flags = self.sprite_table.flags
+        count = len(flags)
+        first = flag_masks["first_frame"]
+        last = flag_masks["last_frame"]
+        # nearest last frame at or after every number (the last sprite)
+        next_last = [count - 1] * count
+        for number in range(count - 2, -1, -1):
+            next_last[number] = (number if flags[number] & last else
+                                 next_last[number + 1])
+        self.anim_ends = []
+        self.anims = {}
+        self.blueprints = [None] * count
+        start = 0
+        for number in range(count):
+            if number > 0 and flags[number] & first:
+                start = number
+            ends = (start, next_last[start])
+            self.anim_ends.append(ends)
+            if ends not in self.anims:
+                self.anims[ends] = tuple(
+                    self.get_sprite(sidx)
+                    for sidx in range(ends[0], ends[1] + 1))
+
+    def reload(self):
+        """
+        Reread the level file (the loose one, never from the asset pack)
+        and rebuild screens whose layers changed only.
+        Return numbers of the rebuilt screens.
+        """
+        previous = self.data
+        data = read_json_file(level_file_path(self.name))
+        if data["names"][:2] != previous["names"][:2]:
+            # other sprite sets, everything changes
+            self.data = data
+            self.build(self.set_names)
+            return list(range(256))
+        self.data = data
+        changed = [s for s in range(256)
+                   if screen_tiles(data["screens"][s]) !=
+                   screen_tiles(previous["screens"][s])]
+        for s in changed:
+            self.screens.invalidate(s)
+        if self.find_start(changed):
+            self.restart()
+        self.index_teleports()
+        self.graph = None
+        logging.info("Level '%s' reloaded: %d screens rebuilt", self.name,
+                     len(changed))
+        return changed
 
     def process(self, screen, sidx, x, y, screen_number):
-        sprite = self.get_sprite(sidx)
-        flags = sprite.flags
-        action = sprite.action
-        param = sprite.param
+        blueprint = self.get_blueprint(sidx)
         position = XY(x * gl.SPRITE_X, y * gl.SPRITE_Y)
-        if (flags == 0x80) & (action == 0):
-            entity = ga.Entity([sprite], position)
-            entity.sprite_index = sidx  # Store for broken sprite lookup
-            screen.collisions.append(entity)
-        elif flags & 0x80:
-            entity = self.__get_active_entity(sidx, position)
-            if isinstance(entity, tuple):
-                # tuple is returned if initialized object has additional one
-                entity[0].set_origin(screen)  # remember screen for deletion
-                entity[0].sprite_index = sidx  # Store for broken sprite lookup
-                screen.active.append(entity[0])
-                # process additional object
-                entity = self.__get_active_entity(entity[1], entity[2])
+        if blueprint.following:
+            # initialized object has additional one
+            entity = blueprint.create(position)
             entity.set_origin(screen)  # remember screen for deletion
             entity.sprite_index = sidx  # Store for broken sprite lookup
-            screen.active.append(entity)
-            if isinstance(entity, ga.Checkpoint) and param == 1:
-                # active checkpoint - level start (only update if different)
-                level_number = gl.level_names.index(self.name)
-                if (gl.checkpoint.get_level() != level_number or
-                    gl.checkpoint.get_screen() != screen_number or
-                    gl.checkpoint.get_position() != position):
-                    gl.checkpoint.update(level_number, screen_number, position)
+            screen.add(entity)
+            # process additional object
+            blueprint, offset = blueprint.following
+            position = position + offset
+        entity = blueprint.create(position)
+        entity.sprite_index = sidx  # Store for broken sprite lookup
+        if blueprint.group == "active":
+            entity.set_origin(screen)  # remember screen for deletion
+            screen.add(entity)
+        elif blueprint.group == "collisions":
+            screen.collisions.append(entity)
         else:
-            entity = ga.Entity([sprite], position)
-            entity.sprite_index = sidx  # Store for broken sprite lookup
             screen.background.append(entity)
 
 
@@ -424,53 +1709,30 @@ class Level(LevelData):
 
     def get_anim_ends(self, number):
         """Return sprite animation start and end numbers as a tuple"""
-        s = number
-        while True and (s > 0):
-            if self.get_sprite(s).flag("first_frame"):
-                break
-            s -= 1
-        start = s
-        while True and (s < 128):
-            if self.get_sprite(s).flag("last_frame"):
-                break
-            s += 1
-        s = min(s, 127)
-        return start, s
+        return self.anim_ends[number]
 
     def get_anim(self, ends):
-        """Return anim sprites list based on 'ends' tuple"""
-        anim = []
-        for sidx in range(ends[0], ends[1] + 1):
-            anim.append(self.get_sprite(sidx))
+        """Return anim sprites tuple (shared, don't modify) based on 'ends'"""
+        anim = self.anims.get(ends)
+        if anim is None:
+            anim = self.anims[ends] = tuple(
+                self.get_sprite(sidx) for sidx in range(ends[0], ends[1] + 1))
         return anim
 
     def reset_screens(self):
         """
-        Recreate all screens from the stored level data.
+        Recreate screens changed since the level load or the last reset
+        (built again from the stored level data on first access).
         Matches C code: memcpy(map, level_map, sizeof(map)) in init_level() (EB.C:1390)
         This restores destroyed objects, killed enemies, and collected items.
         Sprite sets are already loaded, so only screens need recreation.
         """
-        self.screens = []
-        cntr = 0
-        for s in range(256):
-            gl.init_screen_randoms(s)
-            layers = self.data["screens"][s]
-            if layers:
-                screen = Screen()
-                for lay in range(4):
-                    layer = layers[lay]
-                    if layer:
-                        for y in range(gl.SCREEN_Y):
-                            for x in range(gl.SCREEN_X):
-                                sidx = layer[y * gl.SCREEN_X + x]
-                                if sidx != 0:
-                                    self.process(screen, sidx, x, y, s)
-                self.screens.append(screen)
-                cntr += 1
-            else:
-                self.screens.append(None)
-        logging.info("Level '%s' reset: %d screens recreated", self.name, cntr)
+        count = self.screens.reset()
+        self.restart()
+        if not gl.lazy_screens:
+            self.screens.build_all()
+        logging.info("Level '%s' reset: %d screens recreated", self.name,
+                     count)
         return self.screens
 
 # -----------------------------------------------------------------------------
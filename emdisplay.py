@@ -36,6 +36,53 @@ def show():
     pygame.display.flip()
 
 
+# display_image formats of sprites (see emdata.classify)
+BLIT_CLASSES = ("opaque", "colorkey", "alpha")
+# sprite blits per class since the last reset_blit_counts()
+blit_counts = dict.fromkeys(BLIT_CLASSES, 0)
+
+
+def reset_blit_counts():
+    for blit_class in BLIT_CLASSES:
+        blit_counts[blit_class] = 0
+
+
+def draw_sprite(sprite, position):
+    """
+    Display sprite at logical position on the gameplay display.
+
+    sprite - SpriteData (uses its pre-scaled display_image and display_area)
+    position - XY(x, y) or (x, y) in logical (unscaled) pixels
+    """
+    blit_counts[sprite.blit_class] += 1
+    gl.display.blit(sprite.display_image, (position[0] * 2, position[1] * 2),
+                    sprite.display_area)
+
+
+def make_backdrop(entities):
+    """
+    Return opaque surface of the gameplay display size with the entities
+    drawn on black (as the cleared display), in_front sprites left out.
+    Entities of the backdrop must not change their frame.
+    """
+    backdrop = pygame.Surface(gl.display.get_size(), 0, gl.display)
+    backdrop.fill(pygame.Color(0, 0, 0))
+    for entity in entities:
+        sprite = entity.sprites[entity.frame]
+        if not sprite.flag("in_front"):
+            position = entity.get_position()
+            backdrop.blit(sprite.display_image,
+                          (position[0] * 2, position[1] * 2),
+                          sprite.display_area)
+    return backdrop
+
+
+def draw_backdrop(backdrop):
+    """Display backdrop made by make_backdrop() (one opaque blit)."""
+    blit_counts["opaque"] += 1
+    gl.display.blit(backdrop, (0, 0))
+
+
 def message(position, txt, font=None, antialias=True,
             color=pygame.Color(255, 255, 255)):
     """
@@ -91,7 +138,8 @@ info_lines = InfoLines(XY(180 * 2, 8), 3, 5) #default info lines buffer (scaled
 class DiskInfo:
     def __init__(self, position):
         sprite = gl.info.get_sprite(3) # disk segments
-        self.disk = sprite.image.subsurface(pygame.Rect(0, 0, 18, 16))
+        disk = sprite.image.subsurface(pygame.Rect(0, 0, 18, 16))
+        self.disk = pygame.transform.scale2x(disk)  # scaled once
         self.position = position
         self.disks = 0
 
@@ -103,9 +151,8 @@ class DiskInfo:
         # if ((disk_num < 3) || (main_cntr & 0x04))
         if self.disks and (self.disks < 3 or (gl.counter & 0x04)):
             position = XY.from_self(self.position)
-            scaled_disk = pygame.transform.scale2x(self.disk)
             for d in range(self.disks):
-                gl.display.blit(scaled_disk, XY(position.x * 2, position.y * 2))
+                gl.display.blit(self.disk, XY(position.x * 2, position.y * 2))
                 position.x += 22
 
 class LEDBar:
@@ -115,11 +162,13 @@ class LEDBar:
     def __init__(self, position, mapping):
         self.value = 0
         sprite = gl.info.get_sprite(4) # LED indication segments
-        self.leds = [sprite.image.subsurface(pygame.Rect(0, 0, 16, 16)),
-                     sprite.image.subsurface(pygame.Rect(16, 0, 16, 16)),
-                     sprite.image.subsurface(pygame.Rect(32, 0, 16, 16)),
-                     sprite.image.subsurface(pygame.Rect(0, 16, 16, 16)),
-                     sprite.image.subsurface(pygame.Rect(16, 16, 16, 16))]
+        leds = [sprite.image.subsurface(pygame.Rect(0, 0, 16, 16)),
+                sprite.image.subsurface(pygame.Rect(16, 0, 16, 16)),
+                sprite.image.subsurface(pygame.Rect(32, 0, 16, 16)),
+                sprite.image.subsurface(pygame.Rect(0, 16, 16, 16)),
+                sprite.image.subsurface(pygame.Rect(16, 16, 16, 16))]
+        # scaled once here, display() only blits
+        self.leds = [pygame.transform.scale2x(led) for led in leds]
         self.position = position
         self.mapping = mapping
 
@@ -130,11 +179,10 @@ class LEDBar:
         #self.value = int(time.perf_counter()) % 7
         position = XY.from_self(self.position)
         for led in range(6):
-            scaled_led = pygame.transform.scale2x(self.leds[self.mapping[self.value][led]])
-            gl.display.blit(scaled_led, XY(position.x * 2, position.y * 2))
+            gl.display.blit(self.leds[self.mapping[self.value][led]],
+                            XY(position.x * 2, position.y * 2))
             position.x += 16
-        scaled_led = pygame.transform.scale2x(self.leds[4])
-        gl.display.blit(scaled_led, XY(position.x * 2, position.y * 2))
+        gl.display.blit(self.leds[4], XY(position.x * 2, position.y * 2))
 
 class Indicators:
     def __init__(self):
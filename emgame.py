@@ -2,6 +2,7 @@
 
 import emglobals as gl
 import emdata as da
+import emdisplay as di
 import emsound as snd
 from emglobals import XY
 import pygame
@@ -82,7 +83,7 @@ class FSM:
 
 class Entity:
     def __init__(self, sprites, position):
-        assert isinstance(sprites, list)
+        assert isinstance(sprites, (list, tuple))
         self.sprites = sprites
         if not isinstance(position, XY):
             raise ValueError("Entity position must by XY() instance.")
@@ -145,13 +146,13 @@ class Entity:
         logging.debug("vanish() called for %s at %s", self.name(), self.position)
         # remove from the current screen first
         try:
-            gl.screen_manager.get_screen().active.remove(self)
+            gl.screen_manager.get_screen().remove_active(self)
             logging.debug("  Removed from current screen.active")
         except ValueError:
             logging.debug("  NOT in current screen.active")
         # remove from the level definition
         gl.screen_manager.delete_object(gl.screen_manager.get_screen_number(),
-                                        self.position)
+                                        self)
 
     def update(self):
         """Standard empty update method."""
@@ -168,10 +169,7 @@ class Entity:
         """
         sprite = self.sprites[self.frame]
         if not sprite.flag("in_front"):
-            # Scale sprite 2x and position 2x for larger window
-            scaled_image = pygame.transform.scale2x(sprite.image)
-            scaled_pos = XY(self.get_position().x * 2, self.get_position().y * 2)
-            gl.display.blit(scaled_image, scaled_pos)
+            di.draw_sprite(sprite, self.get_position())
             if gl.show_collisions and sprite.flag("active"):
                 # show collision box or lines
                 self.display_collisions(pygame.Color(255, 255, 0))
@@ -181,10 +179,7 @@ class Entity:
 
     def display_deferred(self):
         """Deferred display method usef for in_front sprites."""
-        # Scale sprite 2x and position 2x for larger window
-        scaled_image = pygame.transform.scale2x(self.sprites[self.frame].image)
-        scaled_pos = XY(self.get_position().x * 2, self.get_position().y * 2)
-        gl.display.blit(scaled_image, scaled_pos)
+        di.draw_sprite(self.sprites[self.frame], self.get_position())
         if gl.show_collisions:
             # show collision box or lines
             self.display_collisions(pygame.Color(255, 255, 0))
@@ -227,12 +222,9 @@ class Entity:
             h = (gl.SCREEN_Y * gl.SPRITE_Y) - y
             me = pygame.Rect(x, y, w, h)
             #pygame.draw.rect(gl.display, pygame.Color(255, 255, 255), me, 1)
-            collided = []
-            for obj in screen.collisions:
-                you = obj.get_bbox().copy()
-                you.move_ip(obj.get_position())
-                if me.colliderect(you):
-                    collided.append(obj)
+            collisions = screen.collisions
+            collided = [collisions[index] for index in
+                        me.collidelistall(screen.get_collision_rects())]
             if collided:
                 # sorted by y position - probably not necessary anyway
                 collided.sort(key=lambda o: o.get_top())
@@ -250,23 +242,22 @@ class Entity:
         if screen:
             me = self.get_bbox().copy()
             me.move_ip(self.get_position() + offset)
-            for obj in screen.collisions:
-                you = obj.get_bbox().copy()
-                you.move_ip(obj.get_position())
-                if me.colliderect(you):
-                    sides = obj.get_sides()
-                    if (offset[0] > 0) and sides["L"]:
-                        # move right and left side
-                        collided = collided if collided else True
-                    elif (offset[0] < 0) and sides["R"]:
-                        # move left and right side
-                        collided = collided if collided else True
-                    elif (offset[1] > 0) and sides["T"] and not ignore_ground:
-                        # move down and top side
-                        collided = collided if collided else True
-                    elif (offset[1] < 0) and sides["B"]:
-                        # move up and bottom side
-                        collided = collided if collided else True
+            collisions = screen.collisions
+            for index in me.collidelistall(screen.get_collision_rects()):
+                obj = collisions[index]
+                sides = obj.get_sides()
+                if (offset[0] > 0) and sides["L"]:
+                    # move right and left side
+                    collided = collided if collided else True
+                elif (offset[0] < 0) and sides["R"]:
+                    # move left and right side
+                    collided = collided if collided else True
+                elif (offset[1] > 0) and sides["T"] and not ignore_ground:
+                    # move down and top side
+                    collided = collided if collided else True
+                elif (offset[1] < 0) and sides["B"]:
+                    # move up and bottom side
+                    collided = collided if collided else True
         return collided
 
     def get_touching(self, offset, screen):
@@ -348,6 +339,8 @@ class ScreenManager:
         self.screens = None  # all screens
         self.screen = None  # current screen definition
         self.new_objects = [] # new objects created for current frame
+        self.prefetch_queue = []  # screen numbers to prepare
+        self.prepared = []  # level screens with backdrops, oldest first
 
     def add_screens(self, screens):
         self.screens = screens
@@ -383,37 +376,66 @@ class ScreenManager:
         if self.screens:
             gl.init_screen_randoms(screen_number)
             self.current_screen = screen_number
+            cs = self.screens[self.current_screen]
+            if cs and self.screen and self.screen.source is cs:
+                # back on the same screen, the previous runtime screen
+                # must not share the new one's active list
+                cs.unshare_active()
             # changing screen reinitializes its content
             self.screen = da.Screen()
-            cs = self.screens[self.current_screen]
+            if gl.prefetch_screens:
+                # neighbours the player can pass to (see emgraph.py)
+                links = gl.level.get_graph().get_links(screen_number)
+                self.prefetch_queue = [screen_number] + list(links.values())
             if cs:
-                self.screen.background = copy.copy(cs.background)
-                self.screen.collisions = copy.copy(cs.collisions)
-                self.screen.active = copy.copy(cs.active)
+                # background and collisions are never changed in place,
+                # shared with their prepared collision rects and backdrop;
+                # active until the first change of either screen's list
+                self.screen.source = cs
+                self.screen.background = cs.background
+                self.screen.collisions = cs.collisions
+                self.screen.active = cs.active
+                cs.shared_active = True
                 logging.debug("change_screen(%d): Loaded %d active entities from level data",
                              screen_number, len(cs.active))
             else:
                 self.screen = None
 
-    def delete_object(self, screen, position):
+    def prefetch(self):
+        """
+        Prepare the next queued screen (the current one and the linked ones):
+        build it and make its collision rects and backdrop, so entering it
+        costs a frame like any other. Only the last gl.prepared_screens keep
+        their backdrops. Return False when there is nothing left to prepare.
+        """
+        while self.prefetch_queue:
+            screen = self.screens[self.prefetch_queue.pop(0)]
+            if not screen:
+                continue
+            screen.prepare()
+            if screen in self.prepared:
+                self.prepared.remove(screen)
+            self.prepared.append(screen)
+            while len(self.prepared) > gl.prepared_screens:
+                self.prepared.pop(0).backdrop = None
+            return True
+        return False
+
+    def delete_object(self, screen, entity):
+        """Remove an entity from the level definition (if it is there)."""
         cs = self.screens[screen]
-        found = False
-        for obj in cs.active:
-            if obj.position == position:
-                cs.active.remove(obj)
-                logging.debug("delete_object: Removed %s at %s from screen %d level data",
-                             obj.name(), position, screen)
-                found = True
-                break
-        if not found:
-            logging.debug("delete_object: No object found at %s in screen %d level data",
-                         position, screen)
+        if cs and cs.remove(entity):
+            logging.debug("delete_object: Removed %s at %s from screen %d level data",
+                         entity.name(), entity.position, screen)
+        else:
+            logging.debug("delete_object: No %s at %s in screen %d level data",
+                         entity.name(), entity.position, screen)
 
     def add_to_level_data(self, screen, entity):
         """Add an entity to the level definition so it persists across screen changes."""
         cs = self.screens[screen]
         if cs:
-            cs.active.append(entity)
+            cs.add(entity)
             logging.debug("add_to_level_data: Added %s at %s to screen %d",
                          entity.name(), entity.position, screen)
 
@@ -429,7 +451,7 @@ class ScreenManager:
         Update list of active objects with objects from new objects queue.
         """
         if self.new_objects:
-            self.screen.active.extend(self.new_objects)
+            self.screen.extend_active(self.new_objects)
             self.new_objects = []
 
     def reset_level(self):
@@ -439,20 +461,18 @@ class ScreenManager:
         - memcpy(map, level_map, sizeof(map)) - restore all screens
         - Remove already collected disks from restored screens
         """
-        # Recreate all screens from level data (EB.C:1390)
+        # Recreate changed screens from level data (EB.C:1390)
         self.screens = gl.level.reset_screens()
 
         # Remove collected disks from the restored level (EB.C:1391-1395)
         # In C: for (i = 0; i < disk_num; i++) MAP_REMOVE(disk_x[i], disk_y[i])
         for screen_num, position in gl.disk_positions:
             cs = self.screens[screen_num]
-            if cs:
-                for obj in cs.active[:]:  # iterate over copy to allow removal
-                    if obj.position == position:
-                        cs.active.remove(obj)
-                        logging.debug("reset_level: Removed collected disk at %s from screen %d",
-                                     position, screen_num)
-                        break
+            obj = cs.find(position) if cs else None
+            if obj:
+                cs.remove(obj)
+                logging.debug("reset_level: Removed collected disk at %s from screen %d",
+                             position, screen_num)
 
         logging.info("reset_level: Level reset, %d collected disks preserved", len(gl.disk_positions))
 
@@ -841,10 +861,7 @@ class Checkpoint(Entity):
         Entity.display(self)
         # Display cross sprite overlay when activated
         if self.activated and self.cross_sprite:
-            pos = self.get_position()
-            scaled_cross = pygame.transform.scale2x(self.cross_sprite.image)
-            scaled_pos = XY(pos.x * 2, pos.y * 2)
-            gl.display.blit(scaled_cross, scaled_pos)
+            di.draw_sprite(self.cross_sprite, self.get_position())
 
 
 class Teleport(Entity):
@@ -873,7 +890,7 @@ class Exit(Entity):
             indicator_pos = XY(pos.x, pos.y - gl.SPRITE_Y)
             self.indicator_entity = ExitIndicator([self.indicator_sprite], indicator_pos)
             # Add to active entities so it can be touched
-            gl.screen.active.append(self.indicator_entity)
+            gl.screen.append_active(self.indicator_entity)
             self.indicator_entity.set_origin(gl.screen)
 
 
@@ -1070,15 +1087,14 @@ class EnemyPlatform(Entity):
             return False
         me = self.get_bbox().copy()
         me.move_ip(pos)
-        for obj in screen.collisions:
-            you = obj.get_bbox().copy()
-            you.move_ip(obj.get_position())
-            if me.colliderect(you):
-                sides = obj.get_sides()
-                if direction.x > 0 and sides["L"]:
-                    return True
-                elif direction.x < 0 and sides["R"]:
-                    return True
+        collisions = screen.collisions
+        for index in me.collidelistall(screen.get_collision_rects()):
+            obj = collisions[index]
+            sides = obj.get_sides()
+            if direction.x > 0 and sides["L"]:
+                return True
+            elif direction.x < 0 and sides["R"]:
+                return True
         return False
 
     def has_ground_at(self, x, y, screen):
@@ -1220,13 +1236,10 @@ class EnemyPlatform(Entity):
         self.vanish()
 
     def display(self):
-        # Scale enemy sprite 2x
         if self.anims and self.anim in self.anims:
             anim_sprites = self.anims[self.anim]
             if anim_sprites and self.frame < len(anim_sprites):
-                scaled_image = pygame.transform.scale2x(anim_sprites[self.frame].image)
-                scaled_pos = XY(self.get_position().x * 2, self.get_position().y * 2)
-                gl.display.blit(scaled_image, scaled_pos)
+                di.draw_sprite(anim_sprites[self.frame], self.get_position())
 
 class EnemyFlying(Entity):
     """
@@ -1305,15 +1318,14 @@ class EnemyFlying(Entity):
             return False
         me = self.get_bbox().copy()
         me.move_ip(pos)
-        for obj in screen.collisions:
-            you = obj.get_bbox().copy()
-            you.move_ip(obj.get_position())
-            if me.colliderect(you):
-                sides = obj.get_sides()
-                if direction.x > 0 and sides["L"]:
-                    return True
-                elif direction.x < 0 and sides["R"]:
-                    return True
+        collisions = screen.collisions
+        for index in me.collidelistall(screen.get_collision_rects()):
+            obj = collisions[index]
+            sides = obj.get_sides()
+            if direction.x > 0 and sides["L"]:
+                return True
+            elif direction.x < 0 and sides["R"]:
+                return True
         return False
 
     def update_patrol(self):
@@ -1422,13 +1434,10 @@ class EnemyFlying(Entity):
         self.vanish()
 
     def display(self):
-        # Scale enemy sprite 2x
         if self.anims and self.anim in self.anims:
             anim_sprites = self.anims[self.anim]
             if anim_sprites and self.frame < len(anim_sprites):
-                scaled_image = pygame.transform.scale2x(anim_sprites[self.frame].image)
-                scaled_pos = XY(self.get_position().x * 2, self.get_position().y * 2)
-                gl.display.blit(scaled_image, scaled_pos)
+                di.draw_sprite(anim_sprites[self.frame], self.get_position())
 
 
 class EnemyProjectile(Entity):
@@ -1476,23 +1485,22 @@ class EnemyProjectile(Entity):
         me = self.get_bbox().copy()
         me.move_ip(self.get_position())
 
-        for obj in screen.collisions:
-            you = obj.get_bbox().copy()
-            you.move_ip(obj.get_position())
-            if me.colliderect(you):
-                sides = obj.get_sides()
-                # Only stop on objects that block from the direction we're moving
-                # AND are actual solid walls (have multiple collision sides)
-                num_sides = sum([sides["L"], sides["R"], sides["T"], sides["B"]])
-                if num_sides >= 2:  # Solid walls typically have 2+ collision sides
-                    if self.velocity.x > 0 and sides["L"]:
-                        return True
-                    elif self.velocity.x < 0 and sides["R"]:
-                        return True
-                    elif self.velocity.y > 0 and sides["T"]:
-                        return True
-                    elif self.velocity.y < 0 and sides["B"]:
-                        return True
+        collisions = screen.collisions
+        for index in me.collidelistall(screen.get_collision_rects()):
+            obj = collisions[index]
+            sides = obj.get_sides()
+            # Only stop on objects that block from the direction we're moving
+            # AND are actual solid walls (have multiple collision sides)
+            num_sides = sum([sides["L"], sides["R"], sides["T"], sides["B"]])
+            if num_sides >= 2:  # Solid walls typically have 2+ collision sides
+                if self.velocity.x > 0 and sides["L"]:
+                    return True
+                elif self.velocity.x < 0 and sides["R"]:
+                    return True
+                elif self.velocity.y > 0 and sides["T"]:
+                    return True
+                elif self.velocity.y < 0 and sides["B"]:
+                    return True
         return False
 
     def get_bbox(self):
@@ -1523,9 +1531,8 @@ class EnemyProjectile(Entity):
 
         if self.sprites and len(self.sprites) > 0:
             sprite = self.sprites[self.frame % len(self.sprites)]
-            if sprite and hasattr(sprite, 'image') and sprite.image:
-                scaled_image = pygame.transform.scale2x(sprite.image)
-                gl.display.blit(scaled_image, scaled_pos)
+            if sprite and getattr(sprite, 'display_image', None):
+                di.draw_sprite(sprite, pos)
                 return
 
         # Draw placeholder circle when no valid sprites available
@@ -1553,7 +1560,7 @@ class Explosion(Entity):
         self.frame += 1
         if self.frame >= len(self.sprites):
             # Animation complete - remove explosion
-            gl.screen.active.remove(self)
+            gl.screen.remove_active(self)
 
     def name(self):
         return "Explosion"
@@ -1575,9 +1582,7 @@ class BrokenSprite(Entity):
     def display(self):
         """Display the broken sprite at 2x scale"""
         if self.frame < len(self.sprites):
-            scaled_image = pygame.transform.scale2x(self.sprites[self.frame].image)
-            scaled_pos = XY(self.get_position().x * 2, self.get_position().y * 2)
-            gl.display.blit(scaled_image, scaled_pos)
+            di.draw_sprite(self.sprites[self.frame], self.get_position())
 
     def name(self):
         return "BrokenSprite"
@@ -1606,7 +1611,7 @@ class ExplosionWithBroke(Entity):
             if not self.broken_sprite_spawned and self.broken_entity:
                 # Add broken sprite to current screen
                 if gl.screen:
-                    gl.screen.active.append(self.broken_entity)
+                    gl.screen.append_active(self.broken_entity)
                     logging.debug("ExplosionWithBroke: Added BrokenSprite to current screen at %s",
                                  self.broken_entity.position)
                 # ALSO add to level data so it persists across screen changes
@@ -1615,7 +1620,7 @@ class ExplosionWithBroke(Entity):
                 self.broken_sprite_spawned = True
             # Remove explosion from current screen (not from level data - it was never there)
             try:
-                gl.screen.active.remove(self)
+                gl.screen.remove_active(self)
             except ValueError:
                 logging.debug("ExplosionWithBroke: Already removed from screen")
 
@@ -40,6 +40,24 @@ level_names = ["elek", "koryt", "mieszk", "magaz",
                "fiolet", "10x10", "sluzy", "widok", "test"]
 current_level = 0  # current level number
 level = None  # currently loaded level
+lazy_screens = True  # build level screens on first access
+level_cache_size = 3  # recently played levels kept loaded
+level_cache_budget = 96 * 1024 * 1024  # bytes of kept levels
+preload_exit_level = True  # preload next level on screens with an Exit
+prefetch_screens = True  # prepare neighbouring screens in idle frame time
+prepared_screens = 5  # level screens keeping a prepared backdrop
+sprite_atlas = False  # load each sprite set as a single atlas surface
+sprite_palette = False  # load sprites as 8-bit surfaces (VGA palette)
+classify_sprites = True  # blit opaque/colorkey sprites without alpha
+sprite_set_budget = 32 * 1024 * 1024  # bytes of unused sprite sets kept
+lazy_sprites = True  # make sprite images on first use
+sprite_warm_up = True  # make lazy sprite images in idle frame time
+asset_loader = None  # emloader.AssetLoader decoding files in background
+background_boot = True  # build Gameplay while the main menu shows
+loader_threads = 4  # asset decoding threads, at most CPUs - 1 (0 - none)
+cache_folder = ""  # decoded sprite set cache folder (empty string disables)
+pack_file = r"data.pak"  # asset pack read instead of loose data files
+asset_pack = None  # empack.AssetPack when pack_file is present
 
 # gameplay related globals
 
@@ -65,12 +83,18 @@ game_completed = False # set when all 8 levels completed
 screen_randoms = []
 for r in range(SCREEN_X):
     screen_randoms.append(0)
+screen_random_table = None  # screen_randoms of all 256 screens
 
 # system related globals
 
 log_filename = "em.log"  # empty string disables logging to file
 render_time = 0  # rendering time
 logic_time = 0   # logic processing time
+start_time = 0  # perf_counter() when the game was started
+cold_start_time = None  # seconds from start to the first main menu frame
+loading_progress = 1.0  # decoded files and built parts of Gameplay (0-1)
+watch_data = False  # hot-reload changed data files (see emwatch.py)
+watch_interval = 1.0  # seconds between data folder polls
 
 # global classes
 
@@ -169,17 +193,32 @@ class XY:
 
 # other global functions
 
-def init_screen_randoms(screen_number):
+def draw_screen_randoms(screen_number):
+    """Return screen_randoms of the screen as drawn by the original game."""
     srand(256 * screen_number + screen_number)
     random(256)  # additional call for compatibility reasons
-    for i in range(SCREEN_X):
-        screen_randoms[i] = random(256)
+    return random(256, SCREEN_X)
+
+
+def init_screen_randoms(screen_number):
+    """
+    Set screen_randoms of the screen (taken from screen_random_table, made
+    on first use) and reseed rand() the way drawing them ends.
+    """
+    global screen_random_table
+    if screen_random_table is None:
+        seed = rand_seed
+        screen_random_table = [draw_screen_randoms(number)
+                               for number in range(256)]
+        srand(seed)
+    screen_randoms[:] = screen_random_table[screen_number]
     srand(256 * screen_number + screen_number)
 
 # Borland C 3.1 rand()
 
 MULTIPLIER = 0x015a4e35
 INCREMENT = 1
+SEED_MASK = 0xFFFFFFFF  # Seed is an unsigned long
 rand_seed = 1
 
 
@@ -197,13 +236,25 @@ def rand():
     }
     """
     global rand_seed
-    rand_seed = (MULTIPLIER * rand_seed + INCREMENT)
+    rand_seed = (MULTIPLIER * rand_seed + INCREMENT) & SEED_MASK
     return (rand_seed >> 16) & 0x7FFF
 
 
-def random(num):
-    """ #define random(num)(int)(((long)rand()*(num))/(RAND_MAX+1)) """
-    return int((rand() * num) / 0x8000)
+def random(num, count=None):
+    """
+    #define random(num)(int)(((long)rand()*(num))/(RAND_MAX+1))
+    With count, return list of the next count random(num) numbers.
+    """
+    if count is None:
+        return int((rand() * num) / 0x8000)
+    global rand_seed
+    seed = rand_seed
+    numbers = []
+    for _ in range(count):
+        seed = (MULTIPLIER * seed + INCREMENT) & SEED_MASK
+        numbers.append(int((((seed >> 16) & 0x7FFF) * num) / 0x8000))
+    rand_seed = seed
+    return numbers
 
 # -----------------------------------------------------------------------------
 # test code below
@@ -223,6 +274,20 @@ def main():
     print(screen_randoms)
     init_screen_randoms(34)
     print(screen_randoms)
+    # the table and the batch random() against drawing one by one
+    for screen_number in range(256):
+        srand(256 * screen_number + screen_number)
+        expected = [random(256) for _ in range(SCREEN_X + 1)][1:]
+        init_screen_randoms(screen_number)
+        assert screen_randoms == expected, screen_number
+        assert rand_seed == 256 * screen_number + screen_number
+    for num in (1, 7, 24, 64, 256, 0x8000):
+        srand(num)
+        expected = [random(num) for _ in range(1000)]
+        seed = rand_seed
+        srand(num)
+        assert random(num, 1000) == expected and rand_seed == seed, num
+    print("screen random table and random(num, count) match")
 
 if __name__ == "__main__":
     main()
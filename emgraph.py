@@ -0,0 +1,149 @@
+"""
+Screen graph module
+
+Analysis pass over the tile layers of a level recording which screens
+connect to which. A cell on the border of a screen is open unless a solid
+block (a collisions sprite, see Level.get_blueprint) colliding across that
+border fills it in any layer. Neighbouring screens - left, right, above and
+below, wrapping around the map the same way PlayerEntity.check_bounds does -
+are linked when both are present and open at the same cell of the border
+between them.
+
+The openings are cached next to the level file as <level>.ebg (JSON), used
+as long as the modification times of the level and sprite set files it was
+made from still match.
+"""
+
+import emglobals as gl
+import emlevelbin as lb
+import json
+import os
+import logging
+
+EXTENSION = ".ebg"
+GRAPH_VERSION = 1
+SIDES = ("left", "right", "top", "bottom")
+OPPOSITE = {"left": "right", "right": "left", "top": "bottom", "bottom": "top"}
+STEPS = {"left": -1, "right": 1, "top": -16, "bottom": 16}
+# collide bits (SpriteTable.COLLIDE_BITS) blocking a border
+BLOCKING = {"left": 0x03, "right": 0x03, "top": 0x0C, "bottom": 0x0C}
+# border cells of a screen, bit n of the opening mask is the n-th cell
+BORDER_CELLS = {
+    "left": [row * gl.SCREEN_X for row in range(gl.SCREEN_Y)],
+    "right": [row * gl.SCREEN_X + gl.SCREEN_X - 1
+              for row in range(gl.SCREEN_Y)],
+    "top": list(range(gl.SCREEN_X)),
+    "bottom": [(gl.SCREEN_Y - 1) * gl.SCREEN_X + column
+               for column in range(gl.SCREEN_X)]}
+
+
+def graph_path(name):
+    """Return path to the level's graph file."""
+    return os.path.join(gl.data_folder, name) + EXTENSION
+
+
+def signature(paths):
+    """Return cache signature of the files the graph is made from."""
+    return [[os.path.basename(path), lb.modification_time(path)]
+            for path in paths]
+
+
+class ScreenGraph:
+    """
+    Openings and links of the 256 screens of a level. Openings of
+    a present screen are a bitmask of the open border cells for every side
+    (None for empty screens), links are {side: neighbour screen number} of
+    the screens the player can pass to.
+    """
+    def __init__(self, openings):
+        self.openings = openings
+        self.links = [{} for _ in range(256)]
+        for screen_number, sides in enumerate(openings):
+            if not sides:
+                continue
+            for side in SIDES:
+                neighbour = (screen_number + STEPS[side]) % 256
+                if (openings[neighbour] and sides[side] &
+                        openings[neighbour][OPPOSITE[side]]):
+                    self.links[screen_number][side] = neighbour
+
+    def get_openings(self, screen_number, side):
+        """Return bitmask of the open cells of the screen's border."""
+        sides = self.openings[screen_number]
+        return sides[side] if sides else 0
+
+    def get_links(self, screen_number):
+        """Return {side: neighbour screen number} the screen is linked to."""
+        return self.links[screen_number]
+
+    def get_reachable(self, screen_number):
+        """Return set of screens reachable from the screen through links."""
+        reached = set([screen_number])
+        queue = [screen_number]
+        while queue:
+            for neighbour in self.links[queue.pop()].values():
+                if neighbour not in reached:
+                    reached.add(neighbour)
+                    queue.append(neighbour)
+        return reached
+
+
+def analyse(screens, sprite_table):
+    """
+    Return openings of the screens (level data screens, lists of layers)
+    using the collision bits of the level's sprite table.
+    """
+    table = sprite_table
+    solid = {}  # sprite number -> collide bits of solid blocks
+    for sidx in range(1, len(table)):
+        if (table.used[sidx] and table.flags[sidx] == 0x80 and
+                table.action[sidx] == 0):
+            solid[sidx] = int(table.collide[sidx])
+    openings = []
+    for layers in screens:
+        if not layers:
+            openings.append(None)
+            continue
+        sides = {}
+        for side in SIDES:
+            mask = (1 << len(BORDER_CELLS[side])) - 1
+            for layer in layers:
+                if not layer:
+                    continue
+                for bit, cell in enumerate(BORDER_CELLS[side]):
+                    if solid.get(layer[cell], 0) & BLOCKING[side]:
+                        mask &= ~(1 << bit)
+            sides[side] = mask
+        openings.append(sides)
+    return openings
+
+
+def load_graph(name, paths, screens, sprite_table):
+    """
+    Return ScreenGraph of the level: from its graph file when made from
+    the same files (paths of the level and its sprite set files), otherwise
+    analysed and written to the graph file.
+    """
+    path = graph_path(name)
+    current = signature(paths)
+    try:
+        with open(path, "rt") as gfile:
+            cached = json.load(gfile)
+        if (cached["version"] == GRAPH_VERSION and
+                cached["signature"] == current):
+            return ScreenGraph(cached["openings"])
+        logging.info("Screen graph '%s' is stale", name)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning("Screen graph '%s' unreadable: %s", name, e)
+    openings = analyse(screens, sprite_table)
+    try:
+        # write aside and rename, never leaving a half written graph
+        with open(path + ".tmp", "wt") as gfile:
+            json.dump({"version": GRAPH_VERSION, "signature": current,
+                       "openings": openings}, gfile, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logging.warning("Screen graph '%s' not saved: %s", name, e)
+    return ScreenGraph(openings)
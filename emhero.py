@@ -7,7 +7,6 @@ import emdata as da
 import emgame as ga
 import emsound as snd
 import pygame
-import copy
 import logging
 
 # horizontal move vector
@@ -36,7 +35,7 @@ def put_explosion(x, y):
 
     # Add to current screen's active entities
     if gl.screen:
-        gl.screen.active.append(explosion)
+        gl.screen.append_active(explosion)
 
     logging.debug("Explosion spawned at (%d, %d)", x, y)
 
@@ -54,7 +53,7 @@ class PlayerEntity(ga.FSM, ga.Entity):
         ga.Entity.__init__(self, [da.EmptySprite()], XY(0, 0))
         ga.FSM.__init__(self)
         self.controller = controller
-        self.data = da.SpriteSet()
+        self.data = None
         self.sprites = {}
         self.frames = {}
         # single very narrow bounding box for all anims
@@ -70,7 +69,7 @@ class PlayerEntity(ga.FSM, ga.Entity):
         self.touched = None  # objects touched during recent move
         self.teleport_target = None  # tuple holding teleport destination target
         # load hero sprites
-        self.data.load("hero")
+        self.data = da.sprite_sets.acquire("hero")
         # prepare animation table
         # standing facing left
         self.sprites["LSTAND"] = [(0, 1)]
@@ -134,17 +133,11 @@ class PlayerEntity(ga.FSM, ga.Entity):
             position = self.get_position()
             # display top sprite (scaled 2x)
             sprite = self.sprites[self.anim][self.frame][0]
-            sprite = self.data.get_sprite(sprite)
-            scaled_image = pygame.transform.scale2x(sprite.image)
-            scaled_pos = XY(position.x * 2, position.y * 2)
-            gl.display.blit(scaled_image, scaled_pos)
+            di.draw_sprite(self.data.get_sprite(sprite), position)
             # display bottom sprite (scaled 2x)
             position += (0, gl.SPRITE_Y)
             sprite = self.sprites[self.anim][self.frame][1]
-            sprite = self.data.get_sprite(sprite)
-            scaled_image = pygame.transform.scale2x(sprite.image)
-            scaled_pos = XY(position.x * 2, position.y * 2)
-            gl.display.blit(scaled_image, scaled_pos)
+            di.draw_sprite(self.data.get_sprite(sprite), position)
             if gl.show_collisions:
                 # show collision box and ground testing point
                 self.display_collisions()
@@ -410,25 +403,13 @@ class PlayerEntity(ga.FSM, ga.Entity):
         The first one above the current one on the same X position qualifies.
         If not present on current level, check all levels above wrapping around
         map boundary and continuing from the bottom.
+        Looked up in the level's teleport link table, None (teleporting back
+        to the same place) when there is no teleport in the column.
         """
-        sp = copy.copy(start_pos)
-        self.teleport_target = None
-        sn = gl.screen_manager.get_screen_number()
-        while not self.teleport_target:
-            tp = {}
-            screen = gl.screen_manager.inspect_screen(sn)
-            if screen:
-                for obj in screen.active:
-                    if isinstance(obj, ga.Teleport):
-                        if obj.get_position().x == sp.x:
-                            tp[obj.get_position().y] = obj
-            if tp:
-                for y in range(sp.y, 0, -gl.SPRITE_Y):
-                    if y in tp:
-                        self.teleport_target = (sn, XY(sp.x, y))
-                        break
-            sp.y = (gl.SCREEN_Y + 1) * gl.SPRITE_Y
-            sn = (sn - 16) % 256
+        self.teleport_target = gl.level.get_teleport_target(
+            gl.screen_manager.get_screen_number(), start_pos)
+        if not self.teleport_target:
+            logging.warning("No teleport target for %s", start_pos)
 
     def select_weapon(self, power):
         self.power = power
@@ -1054,7 +1035,7 @@ class Projectile(ga.Entity):
 
             if gl.screen:
                 # Add broken sprite immediately (it will be drawn before the explosion)
-                gl.screen.active.append(broken_entity)
+                gl.screen.append_active(broken_entity)
             # Persist to level data so it survives screen changes
             screen_num = gl.screen_manager.get_screen_number()
             gl.screen_manager.add_to_level_data(screen_num, broken_entity)
@@ -1062,7 +1043,7 @@ class Projectile(ga.Entity):
             # Create explosion (will be drawn on top of broken sprite)
             explosion = ga.Explosion(explosion_sprites, XY(exp_x, exp_y))
             if gl.screen:
-                gl.screen.active.append(explosion)
+                gl.screen.append_active(explosion)
             snd.play_sound('blast')
         else:
             # Non-breakable: explosion only, no broken sprite left behind
@@ -1103,16 +1084,11 @@ class Projectile(ga.Entity):
             # Power level 5 projectiles are 2 sprites tall (scaled 2x)
             sprite = self.sprites[self.frame % len(self.sprites)]
             pos = self.get_position()
-            scaled_image = pygame.transform.scale2x(sprite.image)
-            scaled_pos = XY(pos.x * 2, pos.y * 2)
-            gl.display.blit(scaled_image, scaled_pos)
+            di.draw_sprite(sprite, pos)
             # Second sprite below
             if len(self.sprites) > 1:
                 sprite2 = self.sprites[(self.frame + 1) % len(self.sprites)]
-                pos2 = pos + XY(0, gl.SPRITE_Y)
-                scaled_image2 = pygame.transform.scale2x(sprite2.image)
-                scaled_pos2 = XY(pos2.x * 2, pos2.y * 2)
-                gl.display.blit(scaled_image2, scaled_pos2)
+                di.draw_sprite(sprite2, pos + XY(0, gl.SPRITE_Y))
 
 # -----------------------------------------------------------------------------
 # test code below
@@ -0,0 +1,144 @@
+"""
+Compiled level module
+
+Reads and writes the binary level format made from .ebl files by
+compile_levels.py. A compiled level is memory-mapped (or taken from the
+asset pack) as one buffer; its layout is:
+
+    header  - magic b"EMLV", version, info length (struct HEADER)
+    info    - JSON object with everything of the .ebl but the screens
+              (sprite set names, params)
+    masks   - SCREENS bytes: SCREEN_PRESENT and LAYER_PRESENT bits of
+              every screen
+    tiles   - SCREENS x LAYERS x CELLS uint8 sprite numbers (zeros for
+              missing screens and layers)
+
+read_level() returns the same dict as parsing the .ebl, with "screens" as
+a read-only sequence: None for missing screens, otherwise list of layers,
+each None or memoryview of its CELLS sprite numbers.
+"""
+
+import emglobals as gl
+import emloader as ld
+import collections.abc
+import json
+import mmap
+import os
+import struct
+
+EXTENSION = ".ebc"
+MAGIC = b"EMLV"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, info length
+SCREENS = 256
+LAYERS = 4
+CELLS = gl.SCREEN_X * gl.SCREEN_Y
+SCREEN_PRESENT = 0x80
+LAYER_PRESENT = (0x01, 0x02, 0x04, 0x08)
+
+
+def compiled_path(name):
+    """Return path to the level's compiled file."""
+    return os.path.join(gl.data_folder, name) + EXTENSION
+
+
+def source_path(name):
+    """Return path to the level's .ebl file."""
+    return os.path.join(gl.data_folder, name) + ".ebl"
+
+
+def modification_time(path):
+    """Return mtime of the data file (of the asset pack for packed ones)."""
+    if ld.in_pack(path):
+        path = gl.asset_pack.path
+    return os.stat(path).st_mtime_ns
+
+
+def is_current(name):
+    """
+    Return True when the compiled level exists and is not older than
+    its .ebl file (as read: from the asset pack or loose).
+    """
+    compiled = compiled_path(name)
+    if not ld.exists(compiled):
+        return False
+    source = source_path(name)
+    if not ld.exists(source):
+        return True
+    return modification_time(compiled) >= modification_time(source)
+
+
+class CompiledScreens(collections.abc.Sequence):
+    """Screens of a compiled level, made from the buffer on access."""
+    def __init__(self, masks, tiles):
+        self.masks = masks
+        self.tiles = tiles
+
+    def __len__(self):
+        return SCREENS
+
+    def __getitem__(self, screen):
+        if not 0 <= screen < SCREENS:
+            raise IndexError("screen number out of range")
+        mask = self.masks[screen]
+        if not mask & SCREEN_PRESENT:
+            return None
+        layers = []
+        for layer in range(LAYERS):
+            if mask & LAYER_PRESENT[layer]:
+                start = (screen * LAYERS + layer) * CELLS
+                layers.append(self.tiles[start:start + CELLS])
+            else:
+                layers.append(None)
+        return layers
+
+
+def read_level(path):
+    """Return level data of the compiled level file."""
+    if ld.in_pack(path):
+        buffer = gl.asset_pack.get_bytes(path)
+    else:
+        with open(path, "rb") as lfile:
+            # the mapping stays open as long as the level data uses it
+            buffer = memoryview(mmap.mmap(lfile.fileno(), 0,
+                                          access=mmap.ACCESS_READ))
+    magic, version, info_length = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version %d compiled level: %s" %
+                         (VERSION, path))
+    start = HEADER.size
+    data = json.loads(bytes(buffer[start:start + info_length]))
+    start += info_length
+    masks = buffer[start:start + SCREENS]
+    start += SCREENS
+    data["screens"] = CompiledScreens(
+        masks, buffer[start:start + SCREENS * LAYERS * CELLS])
+    return data
+
+
+def write_level(path, data):
+    """Write level data (as parsed from .ebl) to the compiled file."""
+    info = dict((key, value) for key, value in data.items()
+                if key != "screens")
+    info_data = json.dumps(info, separators=(",", ":")).encode()
+    masks = bytearray(SCREENS)
+    tiles = bytearray(SCREENS * LAYERS * CELLS)
+    for screen, layers in enumerate(data["screens"]):
+        if not layers:
+            continue
+        assert len(layers) == LAYERS
+        masks[screen] = SCREEN_PRESENT
+        for layer, cells in enumerate(layers):
+            if cells is None:
+                continue
+            assert len(cells) == CELLS
+            masks[screen] |= LAYER_PRESENT[layer]
+            start = (screen * LAYERS + layer) * CELLS
+            tiles[start:start + CELLS] = bytes(cells)
+    # write aside and rename, never leaving a half written level
+    with open(path + ".tmp", "wb") as lfile:
+        lfile.write(HEADER.pack(MAGIC, VERSION, len(info_data)))
+        lfile.write(info_data)
+        lfile.write(masks)
+        lfile.write(tiles)
+    os.replace(path + ".tmp", path)
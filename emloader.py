@@ -0,0 +1,167 @@
+"""
+Asset loading module
+
+Decodes image files and reads sound and data files on a thread pool.
+pygame releases the GIL while decoding PNG files, so several files are
+decoded at the same time. Decoded surfaces are returned unconverted:
+convert_alpha() needs the display and is done by the caller on the main
+thread, as is making sounds of the sound files' contents.
+
+Files are read from the asset pack (gl.asset_pack, see empack.py) when it
+contains them, otherwise from the data folder.
+"""
+
+import emglobals as gl
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import os
+import pygame
+
+
+def in_pack(path):
+    return gl.asset_pack is not None and path in gl.asset_pack
+
+
+def exists(path):
+    """Return True when the data file is in the pack or on disk."""
+    return in_pack(path) or os.path.exists(path)
+
+
+def read_data(path):
+    """Return contents of the data file."""
+    if in_pack(path):
+        return bytes(gl.asset_pack.get_bytes(path))
+    with open(path, "rb") as dfile:
+        return dfile.read()
+
+
+def decode_image(path):
+    """Return decoded (not converted) image surface."""
+    if in_pack(path):
+        return gl.asset_pack.get_image(path)
+    return pygame.image.load(path)
+
+
+def worker_count(threads):
+    """
+    Return number of decoding threads to start for the wanted threads: no
+    more than CPUs left beside the main thread (on a single CPU decoding
+    in background only competes with the main thread).
+    """
+    return max(0, min(threads, (os.cpu_count() or 1) - 1))
+
+
+class AssetLoader:
+    """
+    Thread pool decoding requested files in the background.
+    request() queues a file, get() returns its decoded content (waiting
+    for it when necessary) or decodes it right away when not requested.
+    """
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=workers,
+                                       thread_name_prefix="loader")
+        self.pending = {}  # path -> Future
+        self.lock = threading.Lock()  # requests also come from the pool
+
+    def request(self, path, decode=decode_image):
+        """Queue file for decoding with decode(path), once per path."""
+        with self.lock:
+            if path not in self.pending:
+                self.pending[path] = self.pool.submit(decode, path)
+
+    def get(self, path, decode=decode_image):
+        """Return decode(path) result, preloaded when it was requested."""
+        with self.lock:
+            future = self.pending.pop(path, None)
+        if future is None:
+            return decode(path)
+        return future.result()
+
+    def is_done(self, path):
+        """Return True unless the file's requested decoding is running."""
+        with self.lock:
+            future = self.pending.get(path)
+        return future is None or future.done()
+
+    def cancel(self, path):
+        """Drop request of the file (its decoding, when not started yet)."""
+        with self.lock:
+            future = self.pending.pop(path, None)
+        if future is not None:
+            future.cancel()
+
+    def clear(self):
+        """Drop requests nobody asked for (yet)."""
+        with self.lock:
+            for future in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+
+    def shutdown(self):
+        self.clear()
+        self.pool.shutdown(wait=True)
+
+
+def load_asset(path, decode):
+    """Return decode(path), taken from gl.asset_loader when available."""
+    if gl.asset_loader:
+        return gl.asset_loader.get(path, decode)
+    return decode(path)
+
+
+def load_image(path):
+    """Return decoded (not converted) image surface."""
+    return load_asset(path, decode_image)
+
+
+def request(path, decode=decode_image):
+    """Queue file for background decoding (no-op without asset loader)."""
+    if gl.asset_loader:
+        gl.asset_loader.request(path, decode)
+
+
+def is_done(path):
+    """Return True unless background decoding of the file is running."""
+    return not gl.asset_loader or gl.asset_loader.is_done(path)
+
+
+def cancel(path):
+    """Drop request of the file (no-op without asset loader)."""
+    if gl.asset_loader:
+        gl.asset_loader.cancel(path)
+
+# -----------------------------------------------------------------------------
+# test code below
+
+
+def main():
+    """Decode all images with and without the loader and compare them."""
+    import glob
+    import time
+    paths = sorted(glob.glob(os.path.join("data", "*", "*.png")))
+    start = time.perf_counter()
+    direct = [decode_image(path) for path in paths]
+    direct_ms = (time.perf_counter() - start) * 1000
+    for threads in (1, 4):
+        loader = AssetLoader(threads)
+        start = time.perf_counter()
+        for path in paths:
+            loader.request(path)
+        loaded = [loader.get(path) for path in paths]
+        loader_ms = (time.perf_counter() - start) * 1000
+        loader.shutdown()
+        different = [path for path, image, other in zip(paths, direct, loaded)
+                     if pygame.image.tobytes(image, "RGBA") !=
+                     pygame.image.tobytes(other, "RGBA")]
+        print("%d images, %d threads: %.1f ms (main thread %.1f ms), "
+              "%d different" % (len(paths), threads, loader_ms, direct_ms,
+                                len(different)))
+        for path in different:
+            print("  ", path)
+    print("%d CPUs, %d of %d threads started" % (
+        os.cpu_count() or 1, worker_count(gl.loader_threads),
+        gl.loader_threads))
+
+
+if __name__ == "__main__":
+    main()
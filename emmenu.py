@@ -3,11 +3,14 @@
 import emglobals as gl
 from emglobals import XY
 import emdata as da
+import emdisplay as di
+import emloader as ld
 import emsound as snd
 import pygame
 import os
 import json
 import logging
+import time
 
 
 class Letters:
@@ -71,8 +74,8 @@ class Letters:
                     f"{set_name}_{idx:02d}.png"
                 )
 
-                if os.path.exists(image_file_path):
-                    image = pygame.image.load(image_file_path).convert_alpha()
+                if ld.exists(image_file_path):
+                    image = ld.load_image(image_file_path).convert_alpha()
                     # Scale 2x to match game display
                     self.sprites[idx] = pygame.transform.scale2x(image)
                 else:
@@ -320,8 +323,10 @@ class MainMenu:
     OPTIONS_START_Y = 350
     OPTIONS_SPACING = 80
     INSTRUCTIONS_Y = 700
+    LOADING_Y = 600
 
-    def __init__(self):
+    def __init__(self, gameplay=None):
+        self.gameplay = gameplay  # built part by part while the menu shows
         self.letters = Letters()
         self.save_game = SaveGame()
         self.selected = 0
@@ -381,19 +386,27 @@ class MainMenu:
         snd.play_sound('ask')
         option = self.OPTIONS[self.selected]
 
+        # a chosen game starts when the gameplay is built, see update()
         if option == "CONTINUE":
             if self.has_save:
                 self.result = "continue"
-                self.running = False
+                self.running = self.is_loading()
         elif option == "NEW GAME":
             self.result = "new_game"
-            self.running = False
+            self.running = self.is_loading()
         elif option == "QUIT":
             self.result = "quit"
             self.running = False
 
+    def is_loading(self):
+        """Return True while a game is chosen and the gameplay not ready."""
+        return (self.result in ("continue", "new_game") and
+                self.gameplay is not None and not self.gameplay.is_built())
+
     def update(self):
         """Update menu state (animations, etc)."""
+        if self.result in ("continue", "new_game") and not self.is_loading():
+            self.running = False
         # Arrow blink animation (10 frame cycle at 20 FPS = 0.5 sec)
         self.arrow_timer += 1
         if self.arrow_timer >= 10:
@@ -433,6 +446,11 @@ class MainMenu:
                 arrow_x = text_x - 60  # 60 pixels left of text
                 self.letters.render_text(surface, ">", XY(arrow_x, y))
 
+        if self.is_loading():
+            self.letters.render_text_centered(
+                surface, "LOADING %d%%" % (gl.loading_progress * 100),
+                self.LOADING_Y)
+
         # Draw instructions using system font (for clarity)
         self.draw_instructions(surface)
 
@@ -471,6 +489,7 @@ class MainMenu:
         clock = pygame.time.Clock()
 
         while self.running:
+            frame_start = time.perf_counter()
             # Handle input
             self.handle_input()
 
@@ -483,22 +502,42 @@ class MainMenu:
 
             # Show
             pygame.display.flip()
+            if gl.cold_start_time is None and gl.start_time:
+                self.report_cold_start()
+
+            if self.gameplay:
+                # build the gameplay in the rest of the 50 ms frame,
+                # leaving 20 ms spare
+                while (time.perf_counter() - frame_start < 0.03 and
+                       self.gameplay.build_step()):
+                    pass
 
             # Maintain 20 FPS to match game
             clock.tick(20)
 
         return self.result
 
+    @staticmethod
+    def report_cold_start():
+        """Log time from game start to the first menu frame."""
+        gl.cold_start_time = time.perf_counter() - gl.start_time
+        logging.info("Cold start to main menu: %.0f ms",
+                     gl.cold_start_time * 1000)
+        di.info_lines.add("Started in %.0f ms" % (gl.cold_start_time * 1000))
+
 
 # Convenience function for use in em.py
-def show_main_menu():
+def show_main_menu(gameplay=None):
     """
     Show the main menu and return the result.
+    The menu builds the gameplay (see Gameplay.build_step()), a chosen
+    game starts only when it is built, with loading progress shown
+    meanwhile.
 
     Returns:
         str: "continue", "new_game", or "quit"
     """
-    menu = MainMenu()
+    menu = MainMenu(gameplay)
     return menu.run()
 
 
@@ -531,8 +570,6 @@ def save_current_game():
 
 def main():
     """Test the menu system."""
-    import emdisplay as di
-
     # Initialize display
     di.init_display()
 
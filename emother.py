@@ -8,8 +8,7 @@ class EnemyData:
 
 class Enemies:
     def __init__(self):
-        self.data = da.SpriteSet()
-        self.data.load("enem")
+        self.data = da.sprite_sets.acquire("enem")
         self.enemy = []
         self.enemy.append(EnemyData())
         self.enemy[0].anims["MLEFT"] = self.data.get_anim((0, 11))
@@ -69,8 +68,7 @@ class WeaponData:
 
 class Weapons:
     def __init__(self):
-        self.data = da.SpriteSet()
-        self.data.load("weapons")
+        self.data = da.sprite_sets.acquire("weapons")
         self.weapon = {"EXPLOSION": WeaponData(self.data.get_anim((0, 7))),
                        "1_R": WeaponData(self.data.get_anim((8, 15))),
                        "1_L": WeaponData(self.data.get_anim((8, 15))),
@@ -86,8 +84,7 @@ class Weapons:
 
 class Info:
     def __init__(self):
-        self.data = da.SpriteSet()
-        self.data.load("info")
+        self.data = da.sprite_sets.acquire("info")
 
     def get_sprite(self, number):
         return self.data.get_sprite(number)
@@ -0,0 +1,98 @@
+"""
+Asset pack module
+
+Reads the single file asset pack written by pack_assets.py. The pack is
+memory-mapped once; its layout is:
+
+    header  - magic b"EMPK", version, index length (struct HEADER)
+    index   - JSON object: file path relative to the data folder ->
+              [offset, length, width, height] (width/height only for
+              images, stored as raw RGBA pixels, 0 for other files)
+    data    - file contents at offsets relative to the end of the index
+
+Images are created zero-copy from slices of the mapping, other files are
+returned as memoryview slices.
+"""
+
+import emglobals as gl
+import json
+import mmap
+import os
+import struct
+import logging
+import pygame
+
+MAGIC = b"EMPK"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, index length
+
+
+class AssetPack:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.mapping = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        magic, version, index_length = HEADER.unpack_from(self.mapping)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a version %d asset pack: %s" %
+                             (VERSION, path))
+        start = HEADER.size
+        self.index = json.loads(self.mapping[start:start + index_length])
+        self.data_offset = start + index_length
+        self.view = memoryview(self.mapping)
+
+    def key(self, path):
+        """Return index key of the path (relative to the data folder)."""
+        prefix = gl.data_folder + os.sep
+        if path.startswith(prefix):
+            # paths built by os.path.join(gl.data_folder, ...), no need
+            # for the much slower relpath()
+            path = path[len(prefix):]
+        else:
+            path = os.path.relpath(path, gl.data_folder)
+        return path.replace(os.sep, "/")
+
+    def __contains__(self, path):
+        return self.key(path) in self.index
+
+    def get_bytes(self, path):
+        """Return file contents as memoryview of the mapping."""
+        offset, length = self.index[self.key(path)][:2]
+        offset += self.data_offset
+        return self.view[offset:offset + length]
+
+    def get_image(self, path):
+        """Return image as (unconverted) surface sharing the mapping."""
+        offset, length, width, height = self.index[self.key(path)]
+        offset += self.data_offset
+        return pygame.image.frombuffer(self.view[offset:offset + length],
+                                       (width, height), "RGBA")
+
+    def close(self):
+        self.view = None
+        try:
+            self.mapping.close()
+        except BufferError:
+            # surfaces still use the mapping, it goes away with them
+            pass
+        self.file.close()
+
+
+def open_pack():
+    """Open gl.pack_file as gl.asset_pack when present."""
+    if gl.asset_pack or not gl.pack_file or not os.path.exists(gl.pack_file):
+        return
+    try:
+        gl.asset_pack = AssetPack(gl.pack_file)
+        logging.info("Asset pack '%s' opened: %d files",
+                     gl.pack_file, len(gl.asset_pack.index))
+    except (OSError, ValueError) as e:
+        logging.warning("Asset pack not used: %s", e)
+
+
+def close_pack():
+    if gl.asset_pack:
+        gl.asset_pack.close()
+        gl.asset_pack = None
@@ -0,0 +1,49 @@
+"""
+Original VGA palette module
+
+The 256 colour palette of the original game, as 6-bit VGA DAC values
+(0-63 per component). Index 0 is transparent in all sprites.
+Used by conversion/convert_sprites.py and by the indexed colour sprite
+mode (gl.sprite_palette).
+"""
+
+TRANSPARENT = 0  # palette index of transparent pixels
+
+
+VGA_PALETTE = [(0, 0, 0), (0, 0, 42), (0, 42, 0), (0, 42, 42), (42, 0, 0), (42, 0, 42), (42, 21, 0), (42, 42, 42),
+               (21, 21, 21), (21, 21, 63), (21, 63, 21), (21, 63, 63), (63, 21, 21), (63, 21, 63), (63, 63, 21), (63, 63, 63),
+               (4, 4, 4), (13, 13, 13), (16, 16, 16), (18, 18, 18), (20, 20, 20), (23, 23, 23), (25, 25, 25), (29, 29, 29),
+               (33, 33, 33), (38, 38, 38), (42, 42, 42), (46, 46, 46), (50, 50, 50), (54, 54, 54), (59, 59, 59), (63, 63, 63),
+               (19, 0, 0), (24, 0, 0), (28, 0, 0), (33, 0, 0), (39, 0, 0), (45, 0, 0), (51, 0, 0), (57, 0, 0),
+               (63, 0, 0), (63, 20, 20), (63, 24, 24), (63, 28, 28), (63, 33, 33), (63, 39, 39), (63, 46, 46), (63, 54, 54),
+               (1, 16, 0), (1, 19, 0), (1, 21, 0), (1, 23, 0), (1, 24, 0), (1, 26, 0), (1, 28, 0), (2, 33, 0),
+               (1, 39, 0), (1, 45, 0), (1, 51, 0), (0, 57, 0), (0, 63, 0), (37, 63, 36), (47, 63, 46), (54, 63, 54),
+               (0, 17, 17), (0, 21, 21), (0, 25, 25), (0, 28, 28), (0, 32, 32), (0, 35, 35), (0, 39, 39), (0, 42, 42),
+               (0, 46, 46), (0, 49, 49), (0, 53, 53), (0, 56, 56), (0, 60, 60), (0, 63, 63), (42, 63, 63), (54, 63, 63),
+               (0, 11, 18), (0, 12, 22), (0, 16, 28), (0, 19, 33), (0, 23, 39), (0, 27, 45), (0, 31, 51), (0, 35, 57),
+               (0, 39, 63), (8, 42, 63), (16, 44, 63), (23, 47, 63), (31, 50, 63), (39, 53, 63), (46, 56, 63), (54, 59, 63),
+               (0, 0, 19), (2, 2, 24), (3, 3, 29), (5, 5, 33), (6, 6, 37), (8, 8, 42), (10, 10, 46), (11, 11, 50),
+               (13, 13, 54), (14, 14, 59), (16, 16, 63), (23, 24, 63), (31, 32, 63), (39, 39, 63), (46, 47, 63), (54, 54, 63),
+               (21, 15, 7), (27, 18, 9), (32, 20, 11), (37, 23, 13), (41, 25, 15), (45, 28, 17), (49, 30, 18), (54, 33, 20),
+               (58, 35, 22), (61, 38, 25), (63, 41, 28), (63, 44, 32), (63, 46, 36), (63, 49, 41), (63, 53, 47), (63, 56, 52),
+               (26, 13, 10), (29, 15, 11), (33, 16, 13), (36, 18, 13), (42, 21, 7), (48, 24, 0), (54, 27, 0), (59, 30, 0),
+               (63, 32, 3), (63, 39, 3), (63, 46, 4), (63, 53, 6), (59, 59, 6), (63, 63, 34), (63, 63, 46), (63, 63, 55),
+               (15, 17, 9), (12, 19, 9), (13, 21, 14), (14, 24, 17), (17, 29, 21), (19, 33, 24), (24, 40, 30), (29, 46, 36),
+               (9, 15, 19), (9, 17, 21), (13, 19, 23), (12, 22, 26), (11, 24, 30), (12, 26, 33), (17, 33, 40), (22, 39, 47),
+               (17, 17, 12), (19, 19, 12), (21, 21, 13), (23, 23, 14), (27, 27, 17), (30, 30, 20), (35, 35, 23), (40, 40, 28),
+               (18, 18, 16), (19, 20, 18), (21, 21, 19), (21, 22, 19), (23, 24, 21), (27, 28, 24), (33, 34, 30), (39, 40, 36),
+               (14, 17, 17), (12, 19, 19), (13, 20, 20), (15, 22, 22), (16, 25, 25), (20, 30, 30), (26, 35, 35), (34, 42, 42),
+               (14, 17, 19), (16, 19, 21), (19, 21, 23), (21, 23, 26), (23, 26, 29), (26, 29, 32), (33, 35, 38), (37, 39, 41),
+               (6, 17, 17), (6, 19, 17), (7, 20, 18), (8, 22, 20), (7, 25, 23), (10, 30, 28), (12, 38, 34), (13, 45, 40),
+               (21, 16, 9), (24, 18, 9), (26, 20, 9), (29, 22, 9), (31, 23, 8), (35, 25, 9), (38, 28, 11), (42, 32, 12),
+               (32, 15, 15), (45, 18, 15), (52, 21, 17), (55, 24, 19), (59, 28, 21), (58, 32, 25), (58, 34, 28), (57, 37, 32),
+               (45, 16, 3), (50, 20, 3), (54, 24, 3), (58, 27, 4), (63, 29, 13), (63, 36, 22), (63, 41, 32), (62, 49, 42),
+               (31, 41, 13), (35, 46, 15), (40, 55, 14), (50, 60, 17), (44, 16, 35), (47, 24, 41), (55, 30, 48), (57, 38, 51),
+               (50, 19, 25), (57, 22, 27), (63, 29, 36), (63, 41, 45), (25, 17, 29), (30, 21, 35), (36, 26, 41), (42, 34, 46),
+               (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0),
+               (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0)]
+
+
+def rgb_palette():
+    """Return palette as list of 8-bit (r, g, b) tuples."""
+    return [(r * 4, g * 4, b * 4) for r, g, b in VGA_PALETTE]
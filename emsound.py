@@ -3,11 +3,13 @@ Sound effects manager for PyElectroMan.
 Implements sound playback matching original DOS game (EB.H:96-114, EB.C:1410-1428).
 """
 
+import io
 import os
 import logging
 import pygame
 
 import emglobals as gl
+import emloader as ld
 
 # Number of simultaneous mixer channels
 _NUM_CHANNELS = 8
@@ -64,8 +66,11 @@ class SoundManager:
         'eshoot': 4,
     }
 
-    def __init__(self):
-        """Initialize pygame mixer and load all sounds."""
+    def __init__(self, load=True):
+        """
+        Initialize pygame mixer and load all sounds (each by load_sound()
+        later, when load is False).
+        """
         self.sounds = {}
         self.enabled = True
         self.initialized = False
@@ -76,7 +81,9 @@ class SoundManager:
             # Initialize mixer for 8kHz mono WAV files
             pygame.mixer.init(frequency=8000, size=-16, channels=1, buffer=512)
             self.initialized = True
-            self._load_sounds()
+            pygame.mixer.set_num_channels(_NUM_CHANNELS)
+            if load:
+                self._load_sounds()
         except pygame.error as e:
             logging.warning("Sound initialization failed: %s", e)
 
@@ -85,20 +92,28 @@ class SoundManager:
         if not self.initialized:
             return
 
-        pygame.mixer.set_num_channels(_NUM_CHANNELS)
-
-        for name, filename in self.SOUND_FILES.items():
-            path = os.path.join(gl.data_folder, filename)
-            if os.path.exists(path):
-                try:
-                    self.sounds[name] = pygame.mixer.Sound(path)
-                except pygame.error as e:
-                    logging.warning("Failed to load sound %s: %s", filename, e)
+        # read all files in parallel first (unless preloaded)
+        paths = preload_sounds()
+        for name in self.SOUND_FILES:
+            if name in paths:
+                self.load_sound(name)
             else:
-                logging.debug("Sound file not found: %s", path)
+                logging.debug("Sound file not found: %s",
+                              sound_file_path(name))
 
         logging.info("Loaded %d/%d sound effects", len(self.sounds), len(self.SOUND_FILES))
 
+    def load_sound(self, name):
+        """Make the sound of its (existing) file's contents."""
+        if not self.initialized:
+            return
+        try:
+            data = ld.load_asset(sound_file_path(name), ld.read_data)
+            self.sounds[name] = pygame.mixer.Sound(file=io.BytesIO(data))
+        except pygame.error as e:
+            logging.warning("Failed to load sound %s: %s",
+                            self.SOUND_FILES[name], e)
+
     def play(self, sound_name):
         """
         Play a sound effect by name with priority enforcement.
@@ -145,6 +160,25 @@ class SoundManager:
         return self.enabled
 
 
+def sound_file_path(name):
+    """Return path to the sound's WAV file."""
+    return os.path.join(gl.data_folder, SoundManager.SOUND_FILES[name])
+
+
+def preload_sounds():
+    """
+    Request background reading of the sound files, SoundManager makes
+    the sounds. Return {sound name: path} of the requested files.
+    """
+    paths = {}
+    for name in SoundManager.SOUND_FILES:
+        path = sound_file_path(name)
+        if ld.exists(path):
+            ld.request(path, ld.read_data)
+            paths[name] = path
+    return paths
+
+
 def play_sound(name):
     """
     Convenience function to play a sound effect.
@@ -0,0 +1,123 @@
+"""
+Data hot-reload module
+
+Watch mode polls the data folder for changed sprite PNGs, sprite set
+(.ebs) and level (.ebl) files and reloads only what changed:
+
+    sprite PNG  - that sprite of the loaded set (SpriteSet.reload_sprite)
+    .ebs        - sprite information of the loaded set
+                  (SpriteSet.reload_set_file)
+    .ebl        - changed screens of the current level (Level.reload)
+
+SpriteData objects are updated in place, so live entities show new
+sprites right away. Files of sets and levels not loaded are picked up when
+they are loaded. Loose files are always read: prebuilt atlases and the
+asset pack stay stale until create_atlases.py and pack_assets.py are run
+again.
+"""
+
+import emglobals as gl
+import emdata as da
+import emdisplay as di
+import os
+import re
+import time
+import logging
+
+WATCHED_EXTENSIONS = (".png", ".ebs", ".ebl")
+SPRITE_FILE = re.compile(r"^(.+)_(\d\d)\.png$")
+
+
+class DataWatcher:
+    """
+    Polls files of the data folder and of loaded sprite sets' folders
+    every gl.watch_interval seconds.
+    """
+    def __init__(self):
+        self.files, self.folders = self.scan()
+        self.next_poll = time.perf_counter() + gl.watch_interval
+
+    @staticmethod
+    def scan():
+        """Return ({path: (mtime, size)} of watched files, scanned folders)."""
+        folders = [gl.data_folder] + [os.path.join(gl.data_folder, name)
+                                      for name in da.sprite_sets.sets]
+        files = {}
+        for folder in folders:
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith(WATCHED_EXTENSIONS):
+                            stat = entry.stat()
+                            files[entry.path] = (stat.st_mtime_ns,
+                                                 stat.st_size)
+            except OSError as e:
+                logging.warning("Data folder not watched: %s", e)
+        return files, set(folders)
+
+    def poll(self):
+        """
+        Reload files changed since the last poll (when it is time for one).
+        Return True when anything was reloaded.
+        """
+        now = time.perf_counter()
+        if now < self.next_poll:
+            return False
+        self.next_poll = now + gl.watch_interval
+        previous, previous_folders = self.files, self.folders
+        self.files, self.folders = self.scan()
+        # files of folders scanned for the first time are not changes
+        changed = [path for path, state in self.files.items()
+                   if previous.get(path) != state and
+                   os.path.dirname(path) in previous_folders]
+        if not changed:
+            return False
+        start = time.perf_counter()
+        # sorted: a set's .ebs comes before its sprites
+        reloaded = [path for path in sorted(changed) if self.reload(path)]
+        if reloaded:
+            elapsed = (time.perf_counter() - start) * 1000
+            logging.info("Hot reload of %d files: %.1f ms",
+                         len(reloaded), elapsed)
+            di.info_lines.add("Reloaded %d files in %.0f ms" %
+                              (len(reloaded), elapsed))
+        return bool(reloaded)
+
+    @staticmethod
+    def reload(path):
+        """Reload the changed file when it is in use. Return True if so."""
+        folder, name = os.path.split(path)
+        if name.endswith(".ebl"):
+            if gl.level and gl.level.name and \
+                    path == da.level_file_path(gl.level.name):
+                changed = gl.level.reload()
+                gl.screen_manager.add_screens(gl.level.get_screens())
+                current = gl.screen_manager.get_screen_number()
+                if current in changed:
+                    gl.screen_manager.change_screen(current)
+                return True
+            return False
+        set_name = os.path.basename(folder)
+        sprite_set = da.sprite_sets.sets.get(set_name)
+        if sprite_set is None:
+            return False
+        if name == set_name + ".ebs":
+            sprite_set.reload_set_file()
+        else:
+            match = SPRITE_FILE.match(name)
+            if not match or match.group(1) != set_name:
+                return False  # e.g. the atlas, built from the sprites
+            number = int(match.group(2))
+            if not sprite_set.is_used(number):
+                return False
+            sprite_set.reload_sprite(number)
+        # the current level and the cached ones using the set
+        levels = set(da.levels.levels.values())
+        levels.add(gl.level)
+        for level in levels:
+            if level and set_name in level.set_names:
+                level.update_sprite_table()
+        screen = gl.screen_manager.get_screen()
+        if screen:
+            screen.discard_prepared()
+        return True
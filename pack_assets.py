@@ -0,0 +1,68 @@
+"""
+Generate asset pack.
+
+Packs every sprite PNG (as raw RGBA pixels), .ebs, .ebl, compiled level
+(.ebc) and .wav file of the data folder into gl.pack_file (see empack.py
+for the layout).
+The game reads files from the pack when it exists and falls back to the
+loose files for anything missing in it.
+
+Run this script again after changing any data file (including
+create_atlases.py and compile_levels.py runs), or delete the pack to use
+the loose files.
+"""
+
+import json
+import os
+import pygame
+
+import emglobals as gl
+import empack as pk
+
+PACKED_EXTENSIONS = (".png", ".ebs", ".ebl", ".ebc", ".wav")
+ALIGNMENT = 16  # entry offsets alignment
+
+
+def pack_entries():
+    """Return list of (index key, contents, width, height) to be packed."""
+    entries = []
+    for root, dirs, files in os.walk(gl.data_folder):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(PACKED_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            key = os.path.relpath(path, gl.data_folder).replace(os.sep, "/")
+            if name.lower().endswith(".png"):
+                image = pygame.image.load(path)
+                entries.append((key, pygame.image.tobytes(image, "RGBA"))
+                               + image.get_size())
+            else:
+                with open(path, "rb") as dfile:
+                    entries.append((key, dfile.read(), 0, 0))
+    return entries
+
+
+def create_pack():
+    entries = pack_entries()
+    index = {}
+    offset = 0
+    for key, contents, width, height in entries:
+        index[key] = [offset, len(contents), width, height]
+        offset += len(contents)
+        offset += -offset % ALIGNMENT
+    index_data = json.dumps(index, separators=(",", ":")).encode()
+    # pad index, so data (and every entry) starts aligned
+    index_data += b" " * (-(pk.HEADER.size + len(index_data)) % ALIGNMENT)
+    with open(gl.pack_file, "wb") as pfile:
+        pfile.write(pk.HEADER.pack(pk.MAGIC, pk.VERSION, len(index_data)))
+        pfile.write(index_data)
+        for key, contents, width, height in entries:
+            pfile.write(contents)
+            pfile.write(b"\0" * (-len(contents) % ALIGNMENT))
+    print("Created %s (%d files, %d bytes)" %
+          (gl.pack_file, len(entries), os.path.getsize(gl.pack_file)))
+
+
+if __name__ == "__main__":
+    create_pack()